@@ -0,0 +1,57 @@
+import argparse
+import json
+import pathlib
+import platform
+import sys
+from datetime import datetime
+
+from .fixtures import list_resources, record
+from .suite import run, compare
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="benchmark the parse path over the recorded fixtures")
+    run_parser.add_argument("resources", nargs="*", help="resource modules from src/resources, all by default")
+    run_parser.add_argument("--rounds", type=int, default=20)
+    run_parser.add_argument("--output", type=pathlib.Path, help="save the results as json")
+    run_parser.add_argument("--baseline", type=pathlib.Path, help="saved results to compare against")
+    run_parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown or memory growth, 0.2 is 20%%")
+    run_parser.add_argument("--synthetic", action="store_true",
+                            help="benchmark the hand-written pages of fixtures/synthetic instead of the recorded ones")
+    record_parser = commands.add_parser("record", help="record listing and article pages of a resource as fixtures")
+    record_parser.add_argument("resource")
+    record_parser.add_argument("--list-pages", type=int, default=1)
+    record_parser.add_argument("--articles", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        for path in record(args.resource, args.list_pages, args.articles):
+            print(path)
+        sys.exit(0)
+
+    # hand-written pages say nothing about how real ones perform, changes are not gated on them
+    baseline = json.loads(args.baseline.read_text()) if args.baseline is not None else None
+    if baseline is not None and args.synthetic:
+        parser.error("--baseline compares recorded fixtures only, it can't be used with --synthetic")
+    if baseline is not None and baseline.get("synthetic"):
+        parser.error(f"{args.baseline} was measured on the synthetic fixtures, it can't be a baseline")
+
+    results = run(args.resources or list_resources(), args.rounds, args.synthetic)
+    for resource, cases in results.items():
+        for name, measurement in cases.items():
+            print(f"{resource:<12} {name:<22} {measurement.pages_per_sec:10.1f} pages/s {measurement.peak_bytes / 1024:10.1f} KiB peak")
+    if args.output is not None:
+        args.output.write_text(json.dumps({
+            "created": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "rounds": args.rounds,
+            "synthetic": args.synthetic,
+            "results": {resource: {name: measurement._asdict() for name, measurement in cases.items()}
+                        for resource, cases in results.items()}
+        }, indent=2))
+    if baseline is not None:
+        regressions = compare(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        sys.exit(1 if regressions else 0)
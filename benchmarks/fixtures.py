@@ -0,0 +1,73 @@
+import pathlib
+from typing import List, Tuple
+
+from jinja2 import Template
+
+from src.core.entity import ReactorSettings, DriverType
+from src.core.helper.req_inspector import RequestInspector
+from src.core.helper.request_driver import RequestDriver
+from src.resources import discover, load
+
+FIXTURES_FOLDER = pathlib.Path(__file__).parent / "fixtures"
+# hand-written pages for resources nothing was recorded for yet, only benchmarked on request
+SYNTHETIC_FOLDER = FIXTURES_FOLDER / "synthetic"
+KINDS = ("list", "article")
+
+
+def load_settings(resource: str) -> ReactorSettings:
+    return load(discover()[resource])
+
+
+def list_resources() -> List[str]:
+    return sorted(discover())
+
+
+def fixtures_folder(resource: str, kind: str, synthetic: bool = False) -> pathlib.Path:
+    # listings are kept per resource, article pages per host: the resources of one site share them
+    root = SYNTHETIC_FOLDER if synthetic else FIXTURES_FOLDER
+    if kind == "article":
+        return root / discover()[resource].host / kind
+    return root / resource / kind
+
+
+def load_fixtures(resource: str, kind: str, synthetic: bool = False) -> List[Tuple[str, str]]:
+    # (file name, page) for every recorded, or hand-written, page of a kind, in a stable order
+    folder = fixtures_folder(resource, kind, synthetic)
+    return [(path.name, path.read_text(encoding="utf-8")) for path in sorted(folder.glob("*")) if path.is_file()]
+
+
+def record(resource: str, list_pages: int = 1, articles: int = 5) -> List[pathlib.Path]:
+    # fetches listing pages and the first articles on them as they are served right now
+    settings = load_settings(resource)
+    if DriverType.SELENIUM in (settings.list_driver, settings.page_driver):
+        raise ValueError(f"{resource} renders pages in a browser, recording is only done with the request driver")
+    driver = RequestDriver(RequestInspector(settings.hour_limit))
+    href = Template(settings.href)
+    saved = list()
+    hrefs = list()
+    try:
+        for page in range(1, list_pages + 1):
+            data = driver.get_resource(href.render(page=page), {})
+            saved.append(_save(resource, "list", f"page-{page:03}{_suffix(data)}", data))
+            hrefs.extend(article.href for article in settings.parse_articles(data))
+        for number, url in enumerate(hrefs[:articles], start=1):
+            saved.append(_save(resource, "article", f"article-{number:03}.html", driver.get_resource(url, {})))
+    finally:
+        driver.close()
+    return saved
+
+
+def _suffix(data: str) -> str:
+    head = data.lstrip()[:100]
+    if head.startswith("<?xml") or head.startswith("<rss"):
+        return ".xml"
+    if head.startswith("{") or head.startswith("["):
+        return ".json"
+    return ".html"
+
+
+def _save(resource: str, kind: str, name: str, data: str) -> pathlib.Path:
+    path = fixtures_folder(resource, kind) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(data, encoding="utf-8")
+    return path
@@ -0,0 +1,33 @@
+import argparse
+import pathlib
+import time
+
+from src.core.entity import CompiledRecipe, ElementRecipe
+from src.core.parser_backend import parser_backends
+from src.resources.potato import article_info_recipe
+
+
+def bench_backend(backend: str, html: str, rounds: int) -> float:
+    recipe = CompiledRecipe(ElementRecipe(tags=article_info_recipe.tags, parser=article_info_recipe.parser, backend=backend))
+    recipe.parse_data(html)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        recipe.parse_data(html)
+    return (time.perf_counter() - started) / rounds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("page", type=pathlib.Path, nargs="?", default=pathlib.Path("bla.html"))
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    html = args.page.read_text()
+    baseline = None
+    for name in parser_backends:
+        try:
+            seconds = bench_backend(name, html, args.rounds)
+        except ImportError as err:
+            print(f"{name:<12} skipped - {err}")
+            continue
+        baseline = baseline or seconds
+        print(f"{name:<12} {seconds * 1000:8.2f} ms/page {baseline / seconds:6.1f}x")
@@ -0,0 +1,124 @@
+import pathlib
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from src.core.entity import CompiledRecipe, ElementRecipe
+from src.core.functions import functions
+from src.core.helper.archive import save_to_disk
+from .fixtures import load_fixtures, load_settings
+
+
+class Case(NamedTuple):
+    name: str
+    func: Callable[[Any], Any]
+    inputs: List[Any]
+
+
+class Measurement(NamedTuple):
+    pages: int
+    pages_per_sec: float
+    # the most memory one page held at once while being processed
+    peak_bytes: int
+
+
+def measure(case: Case, rounds: int) -> Measurement:
+    for data in case.inputs:
+        case.func(data)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for data in case.inputs:
+            case.func(data)
+    elapsed = time.perf_counter() - started
+    # traced separately, tracemalloc slows every allocation down
+    peak = 0
+    tracemalloc.start()
+    try:
+        for data in case.inputs:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            case.func(data)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return Measurement(len(case.inputs), rounds * len(case.inputs) / elapsed, peak)
+
+
+def resource_cases(resource: str, folder: pathlib.Path, synthetic: bool = False) -> List[Case]:
+    settings = load_settings(resource)
+    settings.compile()
+    cases = list()
+    list_pages = [page for _, page in load_fixtures(resource, "list", synthetic)]
+    if list_pages:
+        cards = [card for page in list_pages for card in settings.list_recipe.parse_data(page).get("articles") or list()]
+        cases += [
+            Case("list.parse_data", settings.list_recipe.parse_data, list_pages),
+            Case("list.parse_articles", settings.parse_articles, list_pages),
+            Case("short.parse_data", settings.article_short_info_recipe.parse_data, cards),
+            Case("short.filters", _filters(settings.article_short_info_recipe), _unfiltered(settings.article_short_info_recipe, cards)),
+        ]
+    article_pages = [page for _, page in load_fixtures(resource, "article", synthetic)]
+    if article_pages and settings.article_info_recipe is not None:
+        articles = [settings.parse_article(page) for page in article_pages]
+        cases += [
+            Case("article.parse_data", settings.article_info_recipe.parse_data, article_pages),
+            Case("article.parse_article", settings.parse_article, article_pages),
+            Case("article.filters", _filters(settings.article_info_recipe), _unfiltered(settings.article_info_recipe, article_pages)),
+            Case("article.save_to_disk", lambda article: save_to_disk("bench", folder, article), articles),
+        ]
+    return cases
+
+
+def run(resources: List[str], rounds: int, synthetic: bool = False) -> Dict[str, Dict[str, Measurement]]:
+    results = dict()
+    with tempfile.TemporaryDirectory() as folder:
+        for resource in resources:
+            results[resource] = {case.name: measure(case, rounds) for case in resource_cases(resource, pathlib.Path(folder), synthetic)}
+    return results
+
+
+def _unfiltered(recipe: ElementRecipe, inputs: List[Any]) -> List[Dict[str, Any]]:
+    # what the selectors hand to the filter chains, so the chains can be timed on their own
+    bare = CompiledRecipe(ElementRecipe(
+        tags={name: tag._replace(filters=[]) for name, tag in recipe.tags.items()},
+        parser=recipe.parser,
+        backend=recipe.backend
+    ))
+    return [bare.parse_data(data) for data in inputs]
+
+
+def _filters(recipe: ElementRecipe) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    chains = {name: [functions[function_name] for function_name in tag.filters] for name, tag in recipe.tags.items()}
+
+    def apply(values: Dict[str, Any]) -> Dict[str, Any]:
+        result = dict()
+        for name, chain in chains.items():
+            value = values[name]
+            if value is not None:
+                for function in chain:
+                    value = function(value)
+            result[name] = value
+        return result
+    return apply
+
+
+def compare(
+        results: Dict[str, Dict[str, Measurement]],
+        baseline: Dict[str, Dict[str, Dict[str, float]]],
+        threshold: float
+) -> List[str]:
+    # regressions beyond threshold (0.2 is 20%) in throughput or memory against a saved run
+    regressions = list()
+    for resource, cases in results.items():
+        for name, measurement in cases.items():
+            base = baseline.get(resource, dict()).get(name)
+            if base is None:
+                continue
+            speed = measurement.pages_per_sec / base["pages_per_sec"]
+            memory = measurement.peak_bytes / base["peak_bytes"] if base["peak_bytes"] else 1
+            if speed < 1 - threshold:
+                regressions.append(f"{resource} {name}: {speed:.2f}x pages/sec of baseline")
+            if memory > 1 + threshold:
+                regressions.append(f"{resource} {name}: {memory:.2f}x peak bytes of baseline")
+    return regressions
@@ -1,38 +1,46 @@
 import argparse
-import importlib.util
+import asyncio
+import contextlib
+import sys
 
-import json
+import itertools
 import multiprocessing
 import os
 import pathlib
 import tempfile
-import zipfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import partial
-from typing import Optional, Iterator, List
+from multiprocessing import util
+from typing import Any, Callable, Dict, Optional, Iterator, List, NamedTuple, Tuple, Union
 
 from dateutil.parser import parse
 
-from src.const import INDEX_DB_FILE, DATA_FOLDER
-from src.core.entity import ArticleInfoShort, ArticleInfo, ReactorSettings
-from src.core.error import RequestError
+from src.const import INDEX_DB_FILE, DATA_FOLDER, ARTICLES_QUEUE_SIZE, ARCHIVE_SHARD_SIZE, WRITER_BATCH_SIZE, ARTICLE_TASK_SIZE, \
+    WRITER_QUEUE_SIZE
+from src.core.entity import ArticleInfoShort, ArticleInfo, ReactorSettings, ResourceWatermark, PageObservation, \
+    DriverType, PagerType
+from src.core.helper.archive import Compression, create_archive_writer
+from src.core.helper.metrics import metrics
+from src.core.helper.page_locator import PageLocator, PageIndex
+from src.core.helper.parse_pool import ParsePool
+from src.core.helper.profiling import StageProfiler, stage
 from src.core.helper.reactor import Reactor
 from src.core.helper.sqllite_connector import SqlliteConnector
-import glob
-
-
-def get_first_index_of_element_from_to(from_: float, to_: float, arr: list[ArticleInfoShort]) -> int:
-    for i, row in enumerate(arr):
-        if to_ <= row.timestamp <= from_:
-            return i
-    return -1
+from src.core.helper.writer_stage import WriterStage
+from src.resources import discover, resolve, load
 
 
 def get_all_articles_binary_search(
         from_dt: Optional[datetime],
         to_dt: Optional[datetime],
-        reactor: Reactor
+        reactor: Reactor,
+        page_index: Optional[PageIndex] = None
 ) -> Iterator[ArticleInfoShort]:
+    bounded = to_dt is not None
     if from_dt is None:
         from_dt = datetime.now()
     if to_dt is None:
@@ -40,38 +48,14 @@ def get_all_articles_binary_search(
     from_: float = from_dt.timestamp()
     to_: float = to_dt.timestamp()
 
-    low = 0
-    high = 1000
-    mid: int = 1
-    articles_data = reactor.go_to_link(str(mid))
-
-    parsed_pages = set()
-    first_matched_index = get_first_index_of_element_from_to(from_, to_, articles_data)
-    height_multiplier = 2
-    while first_matched_index == -1:
-        mid = (high + low) // 2
-        if mid in parsed_pages:
-            raise RequestError('date out of possible range')
-        else:
-            parsed_pages.add(mid)
-        articles_data = reactor.go_to_link(str(mid))
-        if articles_data is None or len(articles_data) == 0:
-            high = mid
-            height_multiplier = 1
-            continue
-        first_matched_index = get_first_index_of_element_from_to(from_, to_, articles_data)
-        create_time: float = articles_data[first_matched_index].timestamp if first_matched_index != -1 else \
-        articles_data[0].timestamp
-        high, low = (high * height_multiplier, mid) if create_time > from_ else (mid, low)
-    reactor.get_pager().set_pages(mid)
-    while first_matched_index == 0 and mid > 1:
-        mid -= 1
-        prev_articles = reactor.go_to_link(str(mid))
-        first_matched_index = get_first_index_of_element_from_to(from_, to_, prev_articles)
-        articles_data = prev_articles + articles_data
-    for article in RequestIterator(reactor, articles_data[:first_matched_index or 0]):
-        # if create_time > from_:
-        #     continue
+    locator = page_index.locator(reactor) if page_index is not None else PageLocator(reactor)
+    page = locator.locate(from_)
+    # with both ends bracketed every page in between is known up front and can be fetched at once
+    last_page = locator.locate(to_) if bounded else None
+    if page_index is not None:
+        page_index.update(locator)
+    reactor.get_pager().set_pages(page)
+    for article in RequestIterator(reactor, [article for article in locator.fetch(page) if article.timestamp <= from_], last_page):
         if article.timestamp < to_:
             break
         yield article
@@ -97,47 +81,463 @@ def get_all_articles(
         yield article
 
 
-def json_serial(obj):
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-
-
-def save_to_disk(file_name: str, folder: pathlib.Path, article: ArticleInfo) -> None:
-    with tempfile.TemporaryDirectory() as temp_dir, zipfile.ZipFile(folder.joinpath(f"{file_name}.zip"), 'w') as zipf:
-        with open(f"{temp_dir}/{file_name}.html", 'w') as html_file:
-            html_file.write(article.html)
-            zipf.write(html_file.name, f'{file_name}.html')
-        with open(f"{temp_dir}/{file_name}.json", 'w') as json_file:
-            article_json = json.dumps(article, default=json_serial)
-            json_file.write(article_json)
-            zipf.write(json_file.name, f'{file_name}.json')
-
-
 class RequestIterator:
-    def __init__(self, reactor: Reactor, articles=None) -> None:
+    def __init__(self, reactor: Reactor, articles=None, last_page: Optional[int] = None) -> None:
         if articles is None:
             articles = list()
         else:
             articles = articles
-        self.index = 0
         self._reactor = reactor
+        self._last_page = last_page
         self.articles = articles
 
     def __iter__(self) -> Iterator[ArticleInfoShort]:
-        for i in self.articles:
-            if self.index == len(self.articles):
-                self.articles.extend(self._reactor.page_next())
-            if self.index == len(self.articles):
-                raise StopIteration()
-            yield i
+        # the given articles, then the following listing pages until one comes back empty
+        yield from self.articles
+        for articles in self._reactor.next_pages(self._last_page):
+            yield from articles
+
+
+class ResourceJob(NamedTuple):
+    resource_id: int
+    settings: ReactorSettings
+    watermark: Optional[ResourceWatermark]
+    skip_known: bool
+    pages: List[PageObservation]
 
 
-def reactor_parse_resource(settings: ReactorSettings, from_dt: datetime, to_dt: datetime) -> List[ArticleInfo]:
+class ResourceDone(NamedTuple):
+    resource_id: int
+    watermark: Optional[ResourceWatermark]
+    pages: List[PageObservation]
+    # the worker's metrics snapshot for this resource
+    metrics: Dict[str, Any]
+
+
+class NewestArticle:
+    def __init__(self) -> None:
+        self.article: Optional[ArticleInfoShort] = None
+
+    def track(self, articles: Iterator[ArticleInfoShort]) -> Iterator[ArticleInfoShort]:
+        for article in articles:
+            if self.article is None or article.timestamp > self.article.timestamp:
+                self.article = article
+            yield article
+
+
+def until_watermark(articles: Iterator[ArticleInfoShort], watermark: ResourceWatermark) -> Iterator[ArticleInfoShort]:
+    for article in articles:
+        if article.id == watermark.article_id or article.timestamp < watermark.published_ts:
+            break
+        yield article
+
+
+def skip_known(
+        articles: Iterator[ArticleInfoShort],
+        resource_id: int,
+        conn: Optional[SqlliteConnector],
+        batch_size: int = 50
+) -> Iterator[ArticleInfoShort]:
+    # drops articles listed twice in this run (pages shift while new articles come in)
+    # and, with a connector, those already in the index, checked in bulk per batch
+    seen = set()
+    while batch := list(itertools.islice(articles, batch_size)):
+        known = conn.existing_ids(resource_id, [article.id for article in batch]) if conn is not None else set()
+        for article in batch:
+            if article.id in known or article.id in seen:
+                continue
+            seen.add(article.id)
+            yield article
+
+
+def reactor_parse_resource(
+        settings: ReactorSettings,
+        from_dt: datetime,
+        to_dt: datetime,
+        watermark: Optional[ResourceWatermark] = None,
+        newest: Optional[NewestArticle] = None,
+        resource_id: Optional[int] = None,
+        conn: Optional[SqlliteConnector] = None,
+        page_index: Optional[PageIndex] = None
+) -> Iterator[ArticleInfo]:
     reactor = Reactor(settings)
-    res = list()
-    for article in get_all_articles_binary_search(from_dt, to_dt, reactor) if settings.is_binary_search else get_all_articles(from_dt, to_dt, reactor):
-        res.append(reactor.article_page(article.href))
-    return res
+    articles = list_articles(reactor, settings, from_dt, to_dt, watermark, newest, resource_id, conn, page_index)
+    try:
+        yield from reactor.article_pages(article.href for article in articles)
+    finally:
+        reactor.close()
+
+
+def list_articles(
+        reactor: Reactor,
+        settings: ReactorSettings,
+        from_dt: datetime,
+        to_dt: datetime,
+        watermark: Optional[ResourceWatermark] = None,
+        newest: Optional[NewestArticle] = None,
+        resource_id: Optional[int] = None,
+        conn: Optional[SqlliteConnector] = None,
+        page_index: Optional[PageIndex] = None
+) -> Iterator[ArticleInfoShort]:
+    # the articles of the date range that still have to be fetched, newest first
+    articles = get_all_articles_binary_search(from_dt, to_dt, reactor, page_index) if settings.is_binary_search else get_all_articles(from_dt, to_dt, reactor)
+    if watermark is not None:
+        articles = until_watermark(articles, watermark)
+    if newest is not None:
+        articles = newest.track(articles)
+    return skip_known(articles, resource_id, conn)
+
+
+def next_watermark(
+        job: ResourceJob,
+        from_dt: Optional[datetime],
+        to_dt: Optional[datetime],
+        newest: NewestArticle
+) -> Optional[ResourceWatermark]:
+    # the mark may only move when the run covered everything between now and the previous mark
+    if newest.article is None or from_dt is not None:
+        return None
+    if job.watermark is not None and to_dt is not None and to_dt.timestamp() > job.watermark.published_ts:
+        return None
+    return ResourceWatermark(
+        article_resource_id=job.resource_id,
+        published_ts=newest.article.timestamp,
+        article_id=newest.article.id,
+        updated_dt=datetime.now()
+    )
+
+
+# queue shared with pool workers, set by the pool initializer
+_articles_queue: Optional[multiprocessing.Queue] = None
+# read connection of a worker process, opened with its first resource that skips known articles
+_index_reader: Optional[SqlliteConnector] = None
+
+
+def index_reader() -> SqlliteConnector:
+    # one per worker for all its resources and tasks, the parent holds the writing one
+    global _index_reader
+    if _index_reader is None:
+        _index_reader = SqlliteConnector(INDEX_DB_FILE, reader=True)
+        # closed on a clean exit of the worker, atexit doesn't run in multiprocessing children
+        util.Finalize(None, _index_reader.close, exitpriority=10)
+    return _index_reader
+
+
+def _init_worker(queue: multiprocessing.Queue) -> None:
+    global _articles_queue
+    _articles_queue = queue
+
+
+def stream_resource(job: ResourceJob, from_dt: Optional[datetime], to_dt: Optional[datetime]) -> None:
+    watermark = None
+    page_index = PageIndex(job.resource_id, job.pages)
+    # a worker crawls one resource at a time, everything it measures until the marker belongs to this one
+    metrics.reset()
+    metrics.resource = job.settings.href
+    try:
+        newest = NewestArticle()
+        conn = index_reader() if job.skip_known else None
+        for article in reactor_parse_resource(job.settings, from_dt, to_dt, job.watermark, newest, job.resource_id, conn, page_index):
+            _articles_queue.put((job.resource_id, article))
+        watermark = next_watermark(job, from_dt, to_dt, newest)
+    finally:
+        # end-of-resource marker, sent even if the resource failed so the parent never waits forever
+        _articles_queue.put(ResourceDone(job.resource_id, watermark, page_index.updated, metrics.snapshot()))
+
+
+def iter_queue(queue: multiprocessing.Queue, producers: int) -> Iterator[Union[Tuple[int, ArticleInfo], ResourceDone]]:
+    finished = 0
+    while finished < producers:
+        item = queue.get()
+        if isinstance(item, ResourceDone):
+            finished += 1
+        yield item
+
+
+def run_pool(jobs: List[ResourceJob], from_dt: Optional[datetime], to_dt: Optional[datetime], stage: WriterStage) -> None:
+    # one resource per worker process from start to end
+    # bounded queue: workers block on put when the parent falls behind, so memory stays flat
+    queue = multiprocessing.Queue(maxsize=ARTICLES_QUEUE_SIZE)
+    with multiprocessing.Pool(initializer=_init_worker, initargs=(queue,)) as pool:
+        result = pool.map_async(partial(stream_resource, from_dt=from_dt, to_dt=to_dt), jobs, chunksize=1)
+        for item in iter_queue(queue, len(jobs)):
+            if isinstance(item, ResourceDone):
+                # every article of the resource is queued before its marker, so the mark moves after them
+                if item.watermark is not None:
+                    stage.put_watermark(item.watermark)
+                if item.pages:
+                    stage.put_pages(item.pages)
+                metrics.merge(item.metrics)
+                continue
+            # known articles were already dropped by the workers unless ignore_exist asks to fetch them again
+            stage.put_article(*item)
+        # workers leave cleanly so their finalizers run (remote browser sessions), __exit__ would kill them
+        pool.close()
+        pool.join()
+        # re-raises the first error of a failed resource
+        result.get()
+
+
+class ListTask(NamedTuple):
+    # index into the jobs every task worker got at start
+    job: int
+
+
+class ArticleTask(NamedTuple):
+    job: int
+    hrefs: List[str]
+
+
+class TaskDone(NamedTuple):
+    job: int
+    listed: bool
+    # article tasks a list task queued, also when it failed half way
+    spawned: int
+    watermark: Optional[ResourceWatermark]
+    pages: List[PageObservation]
+    metrics: Dict[str, Any]
+    # formatted traceback of a failed task
+    error: Optional[str]
+
+
+class ResourceProgress:
+    # a resource is finished once its list task and every article task it queued reported back
+    def __init__(self) -> None:
+        self.listed = False
+        self.spawned = 0
+        self.done = 0
+        self.errors: List[str] = list()
+        self.watermark: Optional[ResourceWatermark] = None
+
+    def finished(self) -> bool:
+        return self.listed and self.done == self.spawned
+
+
+# task queue, jobs and their connection slots of a task worker, set by the worker at start
+_tasks_queue: Optional[multiprocessing.Queue] = None
+_jobs: List[ResourceJob] = list()
+_connections: List[Any] = list()
+# one reactor per resource a task worker has touched, reused by all its tasks
+_reactors: Dict[int, Reactor] = dict()
+_spawned = 0
+
+
+def task_worker(
+        tasks: multiprocessing.Queue,
+        results: multiprocessing.Queue,
+        jobs: List[ResourceJob],
+        connections: List[Any],
+        from_dt: Optional[datetime],
+        to_dt: Optional[datetime]
+) -> None:
+    global _tasks_queue, _articles_queue, _jobs, _connections, _spawned
+    _tasks_queue, _articles_queue, _jobs, _connections = tasks, results, jobs, connections
+    try:
+        while (task := tasks.get()) is not None:
+            job = _jobs[task.job]
+            metrics.reset()
+            metrics.resource = job.settings.href
+            _spawned = 0
+            watermark, pages, error = None, list(), None
+            try:
+                if isinstance(task, ListTask):
+                    watermark, pages = run_list_task(task, from_dt, to_dt)
+                else:
+                    run_article_task(task)
+            except Exception:
+                error = traceback.format_exc()
+            # after the task's articles, so the parent has them all once the resource is finished
+            results.put(TaskDone(task.job, isinstance(task, ListTask), _spawned, watermark, pages, metrics.snapshot(), error))
+    finally:
+        for reactor in _reactors.values():
+            reactor.close()
+
+
+def _task_reactor(job_index: int) -> Reactor:
+    reactor = _reactors.get(job_index)
+    if reactor is None:
+        reactor = _reactors[job_index] = Reactor(_jobs[job_index].settings, connections=_connections[job_index])
+    return reactor
+
+
+def run_list_task(
+        task: ListTask,
+        from_dt: Optional[datetime],
+        to_dt: Optional[datetime]
+) -> Tuple[Optional[ResourceWatermark], List[PageObservation]]:
+    # walks the listing and hands the articles out in batches, any idle worker picks them up
+    global _spawned
+    job = _jobs[task.job]
+    page_index = PageIndex(job.resource_id, job.pages)
+    newest = NewestArticle()
+    conn = index_reader() if job.skip_known else None
+    reactor = _task_reactor(task.job)
+    articles = list_articles(reactor, job.settings, from_dt, to_dt, job.watermark, newest, job.resource_id, conn, page_index)
+    hrefs = (article.href for article in articles)
+    try:
+        while batch := list(itertools.islice(hrefs, ARTICLE_TASK_SIZE)):
+            _tasks_queue.put(ArticleTask(task.job, batch))
+            _spawned += 1
+    finally:
+        # the reactor stays for the article tasks of this worker, its listing browser goes back to the pool
+        reactor.end_listing()
+    return next_watermark(job, from_dt, to_dt, newest), page_index.updated
+
+
+def run_article_task(task: ArticleTask) -> None:
+    job = _jobs[task.job]
+    for article in _task_reactor(task.job).article_pages(task.hrefs):
+        _articles_queue.put((job.resource_id, article))
+
+
+def run_tasks(jobs: List[ResourceJob], from_dt: Optional[datetime], to_dt: Optional[datetime], stage: WriterStage) -> None:
+    # resources split into a list task each and article tasks of ARTICLE_TASK_SIZE pages, all in one queue
+    # that every worker pulls from, so a deep resource keeps all workers busy instead of one;
+    # the per host rate limiter is shared by the processes, so politeness holds however the tasks spread;
+    # so is a semaphore per resource, its article fetches stay within page_workers connections across all workers
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue(maxsize=ARTICLES_QUEUE_SIZE)
+    connections = [multiprocessing.BoundedSemaphore(job.settings.page_workers) for job in jobs]
+    for job_index in range(len(jobs)):
+        tasks.put(ListTask(job_index))
+    workers = [
+        multiprocessing.Process(target=task_worker, args=(tasks, results, jobs, connections, from_dt, to_dt), daemon=True)
+        for _ in range(os.cpu_count() or 1)
+    ]
+    for worker in workers:
+        worker.start()
+    progress = [ResourceProgress() for _ in jobs]
+    try:
+        while not all(resource.finished() for resource in progress):
+            item = results.get()
+            if not isinstance(item, TaskDone):
+                stage.put_article(*item)
+                continue
+            resource = progress[item.job]
+            metrics.merge(item.metrics)
+            if item.error is not None:
+                resource.errors.append(item.error)
+            if item.listed:
+                resource.listed = True
+                resource.spawned = item.spawned
+                resource.watermark = item.watermark
+                if item.pages:
+                    stage.put_pages(item.pages)
+            else:
+                resource.done += 1
+            # the mark moves only when every article of the resource made it to the writer
+            if resource.finished() and resource.watermark is not None and not resource.errors:
+                stage.put_watermark(resource.watermark)
+                resource.watermark = None
+    except BaseException:
+        # workers may be blocked on the full results queue, nobody is going to read it any more
+        for worker in workers:
+            worker.terminate()
+        raise
+    for _ in workers:
+        tasks.put(None)
+    for worker in workers:
+        worker.join()
+    errors = [error for resource in progress for error in resource.errors]
+    if errors:
+        raise RuntimeError(f"{len(errors)} task(s) failed, the first one:\n{errors[0]}")
+
+
+def run_async(jobs: List[ResourceJob], from_dt: Optional[datetime], to_dt: Optional[datetime], stage: WriterStage) -> None:
+    # one event loop does the network I/O of every resource, a process pool does all the parsing
+    with ParsePool([job.settings for job in jobs]) as parse_pool:
+        results = asyncio.run(crawl_resources(jobs, from_dt, to_dt, stage, parse_pool))
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise errors[0]
+
+
+async def crawl_resources(
+        jobs: List[ResourceJob],
+        from_dt: Optional[datetime],
+        to_dt: Optional[datetime],
+        stage: WriterStage,
+        parse_pool: ParsePool
+) -> List[Any]:
+    # the drivers block, so the loop runs them on threads: a listing thread per resource and the article fetches
+    threads = sum(job.settings.page_workers + 1 for job in jobs)
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=threads))
+    return await asyncio.gather(
+        *(crawl_resource(job, index, from_dt, to_dt, stage, parse_pool) for index, job in enumerate(jobs)),
+        return_exceptions=True
+    )
+
+
+async def crawl_resource(
+        job: ResourceJob,
+        index: int,
+        from_dt: Optional[datetime],
+        to_dt: Optional[datetime],
+        stage: WriterStage,
+        parse_pool: ParsePool
+) -> None:
+    loop = asyncio.get_running_loop()
+    reactor = Reactor(job.settings, parser=parse_pool.parser(index))
+    page_index = PageIndex(job.resource_id, job.pages)
+    newest = NewestArticle()
+    hrefs: asyncio.Queue = asyncio.Queue(maxsize=ARTICLES_QUEUE_SIZE)
+    stopped = threading.Event()
+
+    def walk() -> None:
+        # the listing stays synchronous (page location and pagers), it feeds the fetchers from its own thread
+        # sqlite connections stay on the thread that opened them, so the listing thread has its own
+        conn = SqlliteConnector(INDEX_DB_FILE, reader=True) if job.skip_known else None
+        articles = list_articles(reactor, job.settings, from_dt, to_dt, job.watermark, newest, job.resource_id, conn, page_index)
+        try:
+            with contextlib.closing(articles):
+                for article in articles:
+                    if stopped.is_set():
+                        return
+                    asyncio.run_coroutine_threadsafe(hrefs.put(article.href), loop).result()
+        finally:
+            if conn is not None:
+                conn.close()
+            reactor.end_listing()
+            if not stopped.is_set():
+                asyncio.run_coroutine_threadsafe(hrefs.put(None), loop).result()
+
+    async def fetch() -> None:
+        while (href := await hrefs.get()) is not None:
+            html = await reactor.fetch_article_async(href)
+            article = await asyncio.wrap_future(parse_pool.submit(index, "parse_article", html))
+            await asyncio.to_thread(stage.put_article, job.resource_id, article)
+        # the end of the listing for the next fetcher
+        hrefs.put_nowait(None)
+
+    with metrics.labelled(job.settings.href):
+        listing = asyncio.ensure_future(asyncio.to_thread(walk))
+        fetchers = [asyncio.ensure_future(fetch()) for _ in range(reactor.get_page_workers())]
+        try:
+            await asyncio.gather(*fetchers)
+            await listing
+            # every article of the resource is with the writer, so the mark can move
+            watermark = next_watermark(job, from_dt, to_dt, newest)
+            if watermark is not None:
+                stage.put_watermark(watermark)
+        finally:
+            stopped.set()
+            for fetcher in fetchers:
+                fetcher.cancel()
+            # a listing thread blocked on the full queue gets room to see it was stopped
+            while not listing.done():
+                while not hrefs.empty():
+                    hrefs.get_nowait()
+                await asyncio.wait([listing], timeout=0.1)
+            if page_index.updated:
+                stage.put_pages(page_index.updated)
+            reactor.close()
+
+
+engines: Dict[str, Callable[[List[ResourceJob], Optional[datetime], Optional[datetime], WriterStage], None]] = {
+    "pool": run_pool,
+    "tasks": run_tasks,
+    "async": run_async,
+}
 
 
 def parse_articles(
@@ -145,38 +545,99 @@ def parse_articles(
     to_dt: Optional[datetime],
     settings: List[ReactorSettings],
     ignore_exist: bool,
-    ignore_list_collecting: bool
+    ignore_list_collecting: bool,
+    incremental: bool = False,
+    archive_mode: str = "zip",
+    compression: Compression = Compression.DEFLATE,
+    metrics_file: Optional[str] = None,
+    engine: str = "pool"
 ) -> None:
-    conn = SqlliteConnector(INDEX_DB_FILE)
-    with conn, multiprocessing.Pool() as pool:
-        for articles in pool.map(partial(reactor_parse_resource, from_dt=from_dt, to_dt=to_dt), settings):
-            for article in articles:
-                if not conn.has_article(article.id):
-                    filename = f"binance_{article.id}"
-                    save_to_disk(filename, DATA_FOLDER, article)
-                    # conn.insert_article(ArticleRow(id = article.id, datetime.fromtimestamp(article.timestamp), ), soft=True)
+    started = time.perf_counter()
+    metrics.reset()
+    jobs = list()
+    with SqlliteConnector(INDEX_DB_FILE) as conn:
+        for resource_settings in settings:
+            resource_id = conn.get_resource_id(resource_settings.href)
+            jobs.append(ResourceJob(
+                resource_id,
+                resource_settings,
+                conn.get_watermark(resource_id) if incremental else None,
+                skip_known=not ignore_exist,
+                pages=conn.get_page_observations(resource_id)
+            ))
+    writer = create_archive_writer(archive_mode, DATA_FOLDER, compression, ARCHIVE_SHARD_SIZE)
+    resource_names = {job.resource_id: job.settings.href for job in jobs}
+    with writer, WriterStage(INDEX_DB_FILE, writer, WRITER_BATCH_SIZE, WRITER_QUEUE_SIZE, resource_names=resource_names) as stage:
+        engines[engine](jobs, from_dt, to_dt, stage)
+    if metrics_file is not None:
+        metrics.export(metrics_file, time.perf_counter() - started)
+
 
+def profile_resource(
+        settings: ReactorSettings,
+        from_dt: Optional[datetime],
+        to_dt: Optional[datetime],
+        max_articles: int = 20,
+        top: int = 10
+) -> str:
+    # runs one resource in this process and thread, so every stage is seen by the profiler;
+    # articles are archived to a throwaway folder and never reach the index
+    settings = settings._replace(page_workers=1, list_workers=1)
+    with StageProfiler() as profiler, tempfile.TemporaryDirectory() as folder, \
+            create_archive_writer("zip", pathlib.Path(folder), Compression.DEFLATE, ARCHIVE_SHARD_SIZE) as writer:
+        for article in itertools.islice(reactor_parse_resource(settings, from_dt, to_dt), max_articles):
+            with stage("persist"):
+                writer.write(0, f"binance_{article.id}", article)
+    return profiler.report(top)
 
-def import_class_from_path(module_path, class_name):
-    spec = importlib.util.spec_from_file_location("module_name", module_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
 
-    # Get the desired class from the module
-    desired_class = getattr(module, class_name)
-    return desired_class
+def replay_settings(settings: ReactorSettings, archive: str, latency: Optional[float], bandwidth: float) -> ReactorSettings:
+    # the selenium pager clicks through a live browser, so such a listing keeps its driver
+    list_driver = settings.list_driver if settings.pager_type == PagerType.SELENIUM else DriverType.REPLAY
+    return settings._replace(
+        list_driver=list_driver,
+        page_driver=DriverType.REPLAY,
+        replay_archive=archive,
+        replay_latency=latency,
+        replay_bandwidth=bandwidth
+    )
 
 
 if __name__ == "__main__":
-    pattern = r"https://(.*?)/"
-    resources = [import_class_from_path(resource, "settings") for resource in glob.glob(f"{os.getcwd()}/src/resources/*.py")]
-    print(resources)
+    known_resources = discover()
     parser = argparse.ArgumentParser()
-    parser.add_argument("hrefs", type=str, nargs="+")
+    parser.add_argument("hrefs", type=str, nargs="+", help="resource names, hosts or urls of the resources to crawl, or all")
     parser.add_argument("--from-dt", type=lambda x: parse(x))
     parser.add_argument("--to-dt", type=lambda x: parse(x))
     parser.add_argument("--ignore-exist", type=int, default=0)
     parser.add_argument("--ignore-list-collecting", type=int, default=0)
+    parser.add_argument("--incremental", type=int, default=0)
+    parser.add_argument("--archive", choices=["zip", "pack"], default="zip")
+    parser.add_argument("--compression", choices=[compression.value for compression in Compression], default=Compression.DEFLATE.value)
+    parser.add_argument("--record", type=lambda x: os.path.abspath(x), help="append every fetched page to this gzip jsonl archive")
+    parser.add_argument("--replay", type=lambda x: os.path.abspath(x), help="serve pages from a recorded archive instead of the network")
+    parser.add_argument("--replay-latency", type=float, default=None, help="seconds per request, the recorded timing by default")
+    parser.add_argument("--replay-bandwidth", type=float, default=0, help="bytes per second, unlimited by default")
+    parser.add_argument("--engine", choices=sorted(engines), default="pool",
+                        help="pool - a worker per resource, tasks - resources split into tasks shared by all workers, "
+                             "async - one event loop fetching for all resources and a process pool parsing")
+    parser.add_argument("--metrics-file", help="write run metrics here, a json summary for *.json, prometheus text otherwise")
+    parser.add_argument("--profile", choices=sorted(known_resources), help="profile one resource by pipeline stage instead of crawling")
+    parser.add_argument("--profile-articles", type=int, default=20)
     args = parser.parse_args()
     print(args)
-    parse_articles(args.from_dt, args.to_dt, resources, args.ignore_exist, args.ignore_list_collecting)
+    # only the selected resource modules are imported
+    try:
+        selected = [known_resources[args.profile]] if args.profile is not None else resolve(args.hrefs, known_resources)
+    except ValueError as err:
+        parser.error(str(err))
+    print([info.name for info in selected])
+    resources = [load(info) for info in selected]
+    if args.replay is not None:
+        resources = [replay_settings(resource, args.replay, args.replay_latency, args.replay_bandwidth) for resource in resources]
+    if args.record is not None:
+        resources = [resource._replace(record_archive=args.record) for resource in resources]
+    if args.profile is not None:
+        print(profile_resource(resources[0], args.from_dt, args.to_dt, args.profile_articles))
+        sys.exit(0)
+    parse_articles(args.from_dt, args.to_dt, resources, args.ignore_exist, args.ignore_list_collecting, args.incremental, args.archive, Compression(args.compression), args.metrics_file, args.engine)
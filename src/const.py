@@ -7,4 +7,26 @@ load_dotenv()
 INDEX_DB_FILE = pathlib.Path(os.getcwd()) / "articles.db"
 SELENIUM_REMOTE_DRIVER = os.environ.get("SELENIUM_REMOTE_DRIVER")
 DATA_FOLDER = pathlib.Path(os.getcwd()) / "data"
-
+RATE_LIMIT_DB_FILE = pathlib.Path(os.getcwd()) / "rate_limits.db"
+HTTP_CACHE_DB_FILE = pathlib.Path(os.getcwd()) / "http_cache.db"
+ARTICLES_QUEUE_SIZE = int(os.environ.get("ARTICLES_QUEUE_SIZE", 64))
+REQUEST_CONNECT_TIMEOUT = float(os.environ.get("REQUEST_CONNECT_TIMEOUT", 10))
+REQUEST_READ_TIMEOUT = float(os.environ.get("REQUEST_READ_TIMEOUT", 30))
+# 0 turns the http cache off
+HTTP_CACHE_MAX_SIZE = int(os.environ.get("HTTP_CACHE_MAX_SIZE", 1024 ** 3))
+# html parser backend name for recipes without their own, html.parser when unset
+HTML_PARSER_BACKEND = os.environ.get("HTML_PARSER_BACKEND")
+ARCHIVE_SHARD_SIZE = int(os.environ.get("ARCHIVE_SHARD_SIZE", 256 * 1024 ** 2))
+WRITER_BATCH_SIZE = int(os.environ.get("WRITER_BATCH_SIZE", 200))
+# articles waiting for the writer thread, each one carries its whole page: one batch fills while another is written
+WRITER_QUEUE_SIZE = int(os.environ.get("WRITER_QUEUE_SIZE", WRITER_BATCH_SIZE))
+# browsers kept warm per process and browser profile, each one is recycled after SELENIUM_MAX_PAGES pages
+SELENIUM_POOL_SIZE = int(os.environ.get("SELENIUM_POOL_SIZE", 2))
+SELENIUM_MAX_PAGES = int(os.environ.get("SELENIUM_MAX_PAGES", 200))
+# tabs a browser loads at once for article pages
+SELENIUM_TABS = int(os.environ.get("SELENIUM_TABS", 1))
+SELENIUM_PAGE_TIMEOUT = float(os.environ.get("SELENIUM_PAGE_TIMEOUT", 30))
+# seconds to wait for a browser of the pool to come free
+SELENIUM_LEASE_TIMEOUT = float(os.environ.get("SELENIUM_LEASE_TIMEOUT", 300))
+# article pages per task of the tasks engine
+ARTICLE_TASK_SIZE = int(os.environ.get("ARTICLE_TASK_SIZE", 16))
@@ -1,8 +1,19 @@
 from .article_info_short import ArticleInfoShort
 from .article_row import ArticleRow
+from .archive_entry import ArchiveEntry
 from .article_info import ArticleInfo
-from .parse_resource_recipe import ElementRecipe, TagRecipe
+from .page_observation import PageObservation
+from .parse_resource_recipe import ElementRecipe, TagRecipe, CompiledRecipe
 from .parser_type import ParserType
 from .reactor_settings import ReactorSettings, DriverType, PagerType
-from .resource import Resource
+from .scrape_profile import ScrapeProfile
+from .resource_watermark import ResourceWatermark
+
+
+def __getattr__(name: str):
+    # the scrapper based Resource drags in every driver, so it is only imported by code that still uses it
+    if name == "Resource":
+        from .resource import Resource
+        return Resource
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
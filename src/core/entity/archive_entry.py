@@ -0,0 +1,26 @@
+from typing import NamedTuple, Tuple
+
+
+class ArchiveEntry(NamedTuple):
+    article_resource_id: int
+    article_id: str
+    kind: str
+    shard: str
+    offset: int
+    length: int
+    codec: str
+
+    @staticmethod
+    def from_row(row: Tuple[int, str, str, str, int, int, str]) -> 'ArchiveEntry':
+        return ArchiveEntry(
+            article_resource_id=row[0],
+            article_id=row[1],
+            kind=row[2],
+            shard=row[3],
+            offset=row[4],
+            length=row[5],
+            codec=row[6]
+        )
+
+    def to_row(self) -> Tuple[int, str, str, str, int, int, str]:
+        return self.article_resource_id, self.article_id, self.kind, self.shard, self.offset, self.length, self.codec
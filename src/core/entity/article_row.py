@@ -1,29 +1,38 @@
 from datetime import datetime
-from typing import NamedTuple, Tuple
+from typing import NamedTuple, Tuple, Optional
 
 
 class ArticleRow(NamedTuple):
     id: str
     href: str
     slug: str
-    published_dt: datetime
+    published_dt: Optional[datetime]
     article_resource_id: int
-    parsed_dt: datetime
+    parsed_dt: Optional[datetime]
     article_archive_file_version: int
     article_archive_file_path: str
 
     @staticmethod
-    def from_row(row: Tuple[str, str, str, str, int, str, int, str]) -> 'ArticleRow':
+    def from_row(row: Tuple[str, str, str, Optional[str], int, Optional[str], int, str]) -> 'ArticleRow':
         return ArticleRow(
             id=row[0],
             href=row[1],
             slug=row[2],
-            published_dt=datetime.fromisoformat(row[3]),
+            published_dt=datetime.fromisoformat(row[3]) if row[3] is not None else None,
             article_resource_id=row[4],
-            parsed_dt=datetime.fromisoformat(row[5]),
+            parsed_dt=datetime.fromisoformat(row[5]) if row[5] is not None else None,
             article_archive_file_version=row[6],
             article_archive_file_path=row[7]
         )
 
-    def to_row(self) -> Tuple[str, str, str, int, str, int, str]:
-        return self.href, self.slug, self.published_dt.isoformat(), self.article_resource_id, self.parsed_dt.isoformat(), self.article_archive_file_version, self.article_archive_file_path
+    def to_row(self) -> Tuple[str, str, str, Optional[str], int, Optional[str], int, str]:
+        return (
+            self.id,
+            self.href,
+            self.slug,
+            self.published_dt.isoformat() if self.published_dt is not None else None,
+            self.article_resource_id,
+            self.parsed_dt.isoformat() if self.parsed_dt is not None else None,
+            self.article_archive_file_version,
+            self.article_archive_file_path
+        )
@@ -0,0 +1,24 @@
+from typing import NamedTuple, Tuple
+
+
+class PageObservation(NamedTuple):
+    article_resource_id: int
+    page: int
+    min_ts: float
+    max_ts: float
+    size: int
+    observed_at: float
+
+    @staticmethod
+    def from_row(row: Tuple[int, int, float, float, int, float]) -> 'PageObservation':
+        return PageObservation(
+            article_resource_id=row[0],
+            page=row[1],
+            min_ts=row[2],
+            max_ts=row[3],
+            size=row[4],
+            observed_at=row[5]
+        )
+
+    def to_row(self) -> Tuple[int, int, float, float, int, float]:
+        return self.article_resource_id, self.page, self.min_ts, self.max_ts, self.size, self.observed_at
@@ -1,10 +1,13 @@
 import json
-from typing import NamedTuple, Optional, Any
-from bs4 import BeautifulSoup, Tag
+import time
+from operator import itemgetter
+from typing import NamedTuple, Optional, Any, Callable, Tuple
+from src.const import HTML_PARSER_BACKEND
 from src.core.functions import functions
-from jsonpath_ng import parse
+from src.core.helper.metrics import metrics
+from src.core.helper.profiling import stage, add_selector
+from src.core.parser_backend import ParserBackend, get_backend, DEFAULT_BACKEND
 from .parser_type import ParserType
-import feedparser
 
 
 class TagRecipe(NamedTuple):
@@ -17,43 +20,128 @@ class TagRecipe(NamedTuple):
 class ElementRecipe(NamedTuple):
     tags: dict[str, TagRecipe]
     parser: ParserType
+    # html backend name from parser_backends, falls back to HTML_PARSER_BACKEND
+    backend: Optional[str] = None
+    # css selector a browser waits for before the page counts as rendered
+    ready_selector: Optional[str] = None
+
+    def compile(self) -> 'CompiledRecipe':
+        # for the module level recipes of the resources, compiled once and kept for the life of the process;
+        # the recipe itself is kept in the cache to make sure its id is never reused by another object,
+        # so a recipe built on the fly holds a CompiledRecipe of its own instead of coming here
+        compiled = _compiled_recipes.get(id(self))
+        if compiled is None:
+            compiled = _compiled_recipes[id(self)] = (self, CompiledRecipe(self))
+        return compiled[1]
 
     def parse_data(self, data: Any) -> dict[str, Any]:
+        return self.compile().parse_data(data)
+
+
+class CompiledTag(NamedTuple):
+    name: str
+    selector: str
+    select: Callable[[Any], Any]
+    attr: Optional[str]
+    filters: Callable[[Any], Any]
+    unfiltered: bool
+
+
+class CompiledRecipe:
+    def __init__(self, recipe: ElementRecipe) -> None:
+        self._parser = recipe.parser
+        self._parser_label = recipe.parser.name.lower()
+        if recipe.parser == ParserType.RSS:
+            import feedparser
+            self._feedparser = feedparser
+        self.backend: Optional[ParserBackend] = None
+        if recipe.parser == ParserType.HTML:
+            self.backend = get_backend(recipe.backend or HTML_PARSER_BACKEND or DEFAULT_BACKEND)
+        self._tags = [
+            CompiledTag(
+                name, tag.selector, self._compile_selector(tag.selector), tag.attr, _compile_filters(tag.filters), len(tag.filters) == 0
+            )
+            for name, tag in recipe.tags.items()
+        ]
+
+    def _compile_selector(self, selector: str) -> Callable[[Any], Any]:
+        match self._parser:
+            case ParserType.HTML:
+                return self.backend.compile(selector)
+            case ParserType.JSON:
+                # jsonpath_ng and feedparser load with the first recipe that needs them
+                from jsonpath_ng import parse
+                return parse(selector).find
+            case _:
+                return itemgetter(selector)
+
+    def parse_data(self, data: Any, keep_nodes: bool = False) -> dict[str, Any]:
+        # keep_nodes returns raw html fields (no attr, no filters) as parsed nodes instead of serialized html,
+        # so a recipe with the same backend can go on selecting inside them without parsing them again
+        started = time.perf_counter()
+        # time spent in filter chains, reported apart from the selecting that parse_seconds covers as well
+        filtering = 0.0
         result = dict()
-        match self.parser:
+        match self._parser:
             case ParserType.HTML:
-                bs_ = BeautifulSoup(data, self.parser.value)
-                for field_name in self.tags:
-                    tag = self.tags.get(field_name)
-                    selected_tags = bs_.select(tag.selector)
-                    if len(selected_tags) > 0:
-                        result[field_name] = _call_filters_chain(tag.filters, [_get_tag_attr(tag_, tag.attr) for tag_ in selected_tags])
+                root = data if self.backend.is_node(data) else self.backend.parse(data)
+                for tag in self._tags:
+                    selecting_started = time.perf_counter()
+                    selected_tags = tag.select(root)
+                    if len(selected_tags) == 0:
+                        result[tag.name] = None
+                    elif keep_nodes and tag.attr is None and tag.unfiltered:
+                        result[tag.name] = selected_tags
                     else:
-                        result[field_name] = None
+                        values = [self.backend.get_attr(tag_, tag.attr) for tag_ in selected_tags]
+                        add_selector(tag.name, tag.selector, time.perf_counter() - selecting_started)
+                        result[tag.name], seconds = self._filter(tag, values)
+                        filtering += seconds
+                        continue
+                    add_selector(tag.name, tag.selector, time.perf_counter() - selecting_started)
             case ParserType.JSON:
                 json_data = json.loads(data)
-                for field_name in self.tags:
-                    tag = self.tags.get(field_name)
-                    exp = parse(tag.selector)
-                    result[field_name] = exp.find(json_data)
+                for tag in self._tags:
+                    result[tag.name] = tag.select(json_data)
             case ParserType.RSS:
-                rss = feedparser.parse(data)
-                for field_name in self.tags:
-                    tag = self.tags.get(field_name)
-                    selected_tags = rss[tag.selector]
+                rss = self._feedparser.parse(data)
+                for tag in self._tags:
+                    selected_tags = tag.select(rss)
                     if len(selected_tags) > 0:
-                        result[field_name] = _call_filters_chain(tag.filters, [_get_tag_attr(tag_, tag.attr) for tag_ in selected_tags])
+                        result[tag.name], seconds = self._filter(tag, [_get_tag_attr(tag_, tag.attr) for tag_ in selected_tags])
+                        filtering += seconds
                     else:
-                        result[field_name] = None
+                        result[tag.name] = None
             case ParserType.RSS_JSON:
-                json_data = data
-                for field_name in self.tags:
-                    tag = self.tags.get(field_name)
-                    result[field_name] = _call_filters_chain(tag.filters, json_data[tag.selector])
+                for tag in self._tags:
+                    result[tag.name], seconds = self._filter(tag, tag.select(data))
+                    filtering += seconds
+        metrics.observe("parse_seconds", time.perf_counter() - started, parser=self._parser_label)
+        metrics.observe("filter_seconds", filtering, parser=self._parser_label)
+        return result
+
+    @staticmethod
+    def _filter(tag: CompiledTag, values: Any) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        with stage("filters"):
+            value = tag.filters(values)
+        return value, time.perf_counter() - started
+
+
+_compiled_recipes: dict[int, tuple[ElementRecipe, CompiledRecipe]] = dict()
+
+
+def _compile_filters(functions_: list[str]) -> Callable[[Any], Any]:
+    chain = [functions[function_name] for function_name in functions_]
+
+    def call_filters_chain(result: Any) -> Any:
+        for function in chain:
+            result = function(result)
         return result
+    return call_filters_chain
 
 
-def _get_tag_attr(tag: Tag, attr: str) -> Any:
+def _get_tag_attr(tag: Any, attr: str) -> Any:
     match attr:
         case None:
             return str(tag)
@@ -63,9 +151,3 @@ def _get_tag_attr(tag: Tag, attr: str) -> Any:
             return tag
         case _:
             return tag[attr]
-
-
-def _call_filters_chain(functions_: list, result: Any) -> Any:
-    for function_name in functions_:
-        result = functions[function_name](result)
-    return result
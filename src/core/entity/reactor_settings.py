@@ -4,12 +4,17 @@ from typing import NamedTuple, Optional
 
 from . import ArticleInfoShort, ArticleInfo
 from .parse_resource_recipe import TagRecipe, ElementRecipe
+from .parser_type import ParserType
+from .scrape_profile import ScrapeProfile
 from ..error import ContentParsingError
+from ..helper.profiling import stage
 
 
 class DriverType(Enum):
     SELENIUM = 1
     REQUEST = 2
+    # serves pages recorded with record_archive from replay_archive, no network
+    REPLAY = 3
 
 
 class PagerType(Enum):
@@ -31,22 +36,61 @@ class ReactorSettings(NamedTuple):
     list_recipe: ElementRecipe
     article_short_info_recipe: ElementRecipe
     article_info_recipe: Optional[ElementRecipe]
+    # article pages fetched concurrently, only for the request driver
+    page_workers: int = 8
+    # listing pages prefetched concurrently by a simple pager (only for the request driver),
+    # other pagers fetch one page ahead unless this is 1
+    list_workers: int = 4
+    # requests allowed back to back before hour_limit pacing kicks in
+    burst_limit: int = 1
+    # seconds a cached page is served without asking the server, after that it is revalidated with a conditional get
+    list_cache_ttl: int = 0
+    page_cache_ttl: int = 86400
+    # browser setup for the selenium drivers
+    scrape_profile: ScrapeProfile = ScrapeProfile()
+    # gzip jsonl archive every fetched page is appended to
+    record_archive: Optional[str] = None
+    # archive the REPLAY driver reads, latency None replays the recorded timing, bandwidth in bytes per second (0 - unlimited)
+    replay_archive: Optional[str] = None
+    replay_latency: Optional[float] = None
+    replay_bandwidth: float = 0
+
+    def compile(self) -> None:
+        for recipe in (self.list_recipe, self.article_short_info_recipe, self.article_info_recipe):
+            if recipe is not None:
+                recipe.compile()
+
+    def list_ready_selector(self) -> Optional[str]:
+        # a listing is rendered once its article cards are there
+        recipe = self.list_recipe
+        if recipe.ready_selector is None and recipe.parser == ParserType.HTML and "articles" in recipe.tags:
+            return recipe.tags["articles"].selector
+        return recipe.ready_selector
+
+    def page_ready_selector(self) -> Optional[str]:
+        return self.article_info_recipe.ready_selector if self.article_info_recipe is not None else None
 
     def parse_articles(self, html: str) -> list[ArticleInfoShort]:
-        parsed_articles_html = self.list_recipe.parse_data(html)
+        list_recipe = self.list_recipe.compile()
+        # article cards go to the short info recipe as nodes when both recipes parse with the same backend
+        keep_nodes = list_recipe.backend is not None and list_recipe.backend is self.article_short_info_recipe.compile().backend
+        with stage("list parse"):
+            parsed_articles_html = list_recipe.parse_data(html, keep_nodes=keep_nodes)
         articles = list()
-        for article_html in parsed_articles_html.get("articles"):
-            parsed_article = self.article_short_info_recipe.parse_data(article_html)
-            articles.append(ArticleInfoShort(
-                id=parsed_article.get("id"),
-                href=parsed_article.get("href"),
-                timestamp=parsed_article.get("datetime").timestamp()
-            ))
+        with stage("short-info parse"):
+            for article_html in parsed_articles_html.get("articles") or list():
+                parsed_article = self.article_short_info_recipe.parse_data(article_html)
+                articles.append(ArticleInfoShort(
+                    id=parsed_article.get("id"),
+                    href=parsed_article.get("href"),
+                    timestamp=parsed_article.get("datetime").timestamp()
+                ))
         return articles
 
     def parse_article(self, html: str) -> ArticleInfo:
         try:
-            parsed_article = self.article_info_recipe.parse_data(html)
+            with stage("article parse"):
+                parsed_article = self.article_info_recipe.parse_data(html)
             return ArticleInfo(
                 id=parsed_article.get("id"),
                 href=parsed_article.get("href"),
@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import NamedTuple, Tuple
+
+
+class ResourceWatermark(NamedTuple):
+    article_resource_id: int
+    published_ts: float
+    article_id: str
+    updated_dt: datetime
+
+    @staticmethod
+    def from_row(row: Tuple[int, float, str, str]) -> 'ResourceWatermark':
+        return ResourceWatermark(
+            article_resource_id=row[0],
+            published_ts=row[1],
+            article_id=row[2],
+            updated_dt=datetime.fromisoformat(row[3])
+        )
+
+    def to_row(self) -> Tuple[int, float, str, str]:
+        return self.article_resource_id, self.published_ts, self.article_id, self.updated_dt.isoformat()
@@ -0,0 +1,27 @@
+from typing import NamedTuple, Tuple
+
+# url patterns chrome's network layer blocks for each resource kind
+_RESOURCE_PATTERNS = {
+    "image": ("*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico"),
+    "media": ("*.mp4", "*.webm", "*.ogg", "*.mp3", "*.m3u8", "*.m4a"),
+    "font": ("*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"),
+}
+
+
+class ScrapeProfile(NamedTuple):
+    headless: bool = True
+    # "eager" hands the page back on DOMContentLoaded, "normal" waits for every subresource
+    page_load_strategy: str = "eager"
+    blocked_resources: Tuple[str, ...] = ("image", "media", "font")
+    # third-party hosts (ads, analytics, widgets) that never resolve, subdomains included
+    blocked_domains: Tuple[str, ...] = ()
+    # seconds to wait for the recipe's ready selector once the page is loaded
+    ready_timeout: float = 10
+
+    def blocked_urls(self) -> list[str]:
+        return [pattern for kind in self.blocked_resources for pattern in _RESOURCE_PATTERNS[kind]]
+
+    def host_resolver_rules(self) -> str:
+        return ", ".join(
+            f"MAP {host} ~NOTFOUND" for domain in self.blocked_domains for host in (domain, f"*.{domain}")
+        )
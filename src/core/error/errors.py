@@ -1,5 +1,14 @@
+from typing import Optional
+
+
 class RequestError(Exception):
-    pass
+    # status is the HTTP status code of the response, None when there was no response (timeout, reset, browser)
+    def __init__(self, message: str = "", status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+    def not_found(self) -> bool:
+        return self.status == 404
 
 
 class ContentParsingError(Exception):
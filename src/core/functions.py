@@ -1,10 +1,12 @@
 import re
-from typing import Any, Optional
+from typing import Any, Optional, TYPE_CHECKING
 
-from bs4 import Tag
 from datetime import datetime
 from dateutil.parser import parse
 
+if TYPE_CHECKING:
+    from bs4 import Tag
+
 
 def pattern_matcher(s: str, pattern_: str) -> str:
     match = re.search(pattern_, s)
@@ -37,11 +39,11 @@ def date_format_b_d_Y_A_H_M(date_: str) -> datetime:
     return datetime.strptime(date_, "%b %d, %Y @ %H:%M")
 
 
-def select_prev_li_without_classes(tag: Tag) -> Optional[Tag]:
+def select_prev_li_without_classes(tag: 'Tag') -> Optional['Tag']:
     return tag.findPrevious("li:not([class*='.'])")
 
 
-def get_tag_attr(tag: Tag, attr: str) -> Any:
+def get_tag_attr(tag: 'Tag', attr: str) -> Any:
     match attr:
         case None:
             return str(tag)
@@ -51,7 +53,7 @@ def get_tag_attr(tag: Tag, attr: str) -> Any:
             return tag[attr]
 
 
-def get_tag_href(tag: Tag) -> str:
+def get_tag_href(tag: 'Tag') -> str:
     return get_tag_attr(tag, "href") if tag is not None else ""
 
 
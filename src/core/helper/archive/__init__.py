@@ -0,0 +1,3 @@
+from .compression import Compression
+from .archive_writer import ArchiveWriter, ZipArchiveWriter, PackArchiveWriter, create_archive_writer, save_to_disk, json_serial
+from .archive_reader import ArchiveReader
@@ -0,0 +1,69 @@
+import mmap
+import pathlib
+import zipfile
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from src.core.entity import ArchiveEntry
+from src.core.helper.sqllite_connector import SqlliteConnector
+from .archive_writer import ZipArchiveWriter
+from .compression import Compression, decompress
+
+
+class ArchiveReader:
+    def __init__(self, conn: SqlliteConnector, folder: pathlib.Path) -> None:
+        self._conn = conn
+        self._folder = folder
+        self._shards: Dict[str, mmap.mmap] = dict()
+
+    def _shard(self, entry: ArchiveEntry) -> mmap.mmap:
+        shard = self._shards.get(entry.shard)
+        # the newest shard keeps growing, remap it when an entry lies past the mapped end
+        if shard is None or shard.size() < entry.offset + entry.length:
+            if shard is not None:
+                shard.close()
+            with open(self._folder.joinpath(entry.shard), "rb") as file:
+                shard = self._shards[entry.shard] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return shard
+
+    def _read_entry(self, entry: ArchiveEntry) -> str:
+        shard = self._shard(entry)
+        with memoryview(shard)[entry.offset:entry.offset + entry.length] as payload:
+            return decompress(Compression(entry.codec), payload).decode()
+
+    def _read_zip(self, resource_id: int, article_id: str, kind: str) -> Optional[str]:
+        row = self._conn.get_article_info(resource_id, article_id)
+        if row is None or row.article_archive_file_version != ZipArchiveWriter.version:
+            return None
+        path = pathlib.Path(row.article_archive_file_path)
+        with zipfile.ZipFile(path) as zipf:
+            return zipf.read(f"{path.stem}.{kind}").decode()
+
+    def read(self, resource_id: int, article_id: str, kind: str = "html") -> Optional[str]:
+        for entry in self._conn.get_archive_entries(resource_id, [article_id]):
+            if entry.kind == kind:
+                return self._read_entry(entry)
+        return self._read_zip(resource_id, article_id, kind)
+
+    def read_many(self, resource_id: int, article_ids: Iterable[str], kind: str = "html") -> Iterator[Tuple[str, str]]:
+        # payloads come in shard and offset order, not in the order of article_ids, so the disk reads sequentially
+        article_ids = set(article_ids)
+        entries = [entry for entry in self._conn.get_archive_entries(resource_id, article_ids) if entry.kind == kind]
+        entries.sort(key=lambda entry: (entry.shard, entry.offset))
+        for entry in entries:
+            article_ids.discard(entry.article_id)
+            yield entry.article_id, self._read_entry(entry)
+        for article_id in sorted(article_ids):
+            data = self._read_zip(resource_id, article_id, kind)
+            if data is not None:
+                yield article_id, data
+
+    def close(self) -> None:
+        for shard in self._shards.values():
+            shard.close()
+        self._shards.clear()
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
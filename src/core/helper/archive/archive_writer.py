@@ -0,0 +1,127 @@
+import json
+import os
+import pathlib
+import zipfile
+from datetime import datetime
+from typing import List, Tuple
+
+from src.core.entity import ArticleInfo, ArchiveEntry
+from .compression import Compression, zip_compression, compress
+
+
+def json_serial(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+
+
+def save_to_disk(file_name: str, folder: pathlib.Path, article: ArticleInfo, compression: Compression = Compression.DEFLATE) -> None:
+    with zipfile.ZipFile(folder.joinpath(f"{file_name}.zip"), 'w', compression=zip_compression(compression)) as zipf:
+        zipf.writestr(f'{file_name}.html', article.html)
+        zipf.writestr(f'{file_name}.json', json.dumps(article, default=json_serial))
+
+
+class ArchiveWriter:
+    # stored in article_links.article_archive_file_version so readers know how to open the path
+    version: int
+
+    def write(self, resource_id: int, file_name: str, article: ArticleInfo) -> Tuple[str, List[ArchiveEntry]]:
+        pass
+
+    def sync(self) -> None:
+        # makes everything written so far durable, callers index a batch only after it
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+
+class ZipArchiveWriter(ArchiveWriter):
+    version = 1
+
+    def __init__(self, folder: pathlib.Path, compression: Compression = Compression.DEFLATE) -> None:
+        zip_compression(compression)
+        folder.mkdir(parents=True, exist_ok=True)
+        self._folder = folder
+        self._compression = compression
+        self._not_synced: List[pathlib.Path] = list()
+
+    def write(self, resource_id: int, file_name: str, article: ArticleInfo) -> Tuple[str, List[ArchiveEntry]]:
+        save_to_disk(file_name, self._folder, article, self._compression)
+        path = self._folder.joinpath(f"{file_name}.zip")
+        self._not_synced.append(path)
+        return str(path), []
+
+    def sync(self) -> None:
+        for path in self._not_synced:
+            _fsync(path, os.O_RDONLY)
+        if self._not_synced:
+            _fsync(self._folder, os.O_RDONLY)
+        self._not_synced.clear()
+
+
+class PackArchiveWriter(ArchiveWriter):
+    # append-only shard files, every payload is compressed on its own and located by the index
+    version = 2
+
+    def __init__(self, folder: pathlib.Path, compression: Compression = Compression.DEFLATE, shard_size: int = 256 * 1024 ** 2) -> None:
+        folder.mkdir(parents=True, exist_ok=True)
+        self._folder = folder
+        self._compression = compression
+        self._shard_size = shard_size
+        shards = sorted(folder.glob("pack-*.bin"))
+        self._shard_number = int(shards[-1].stem.split("-")[1]) if shards else 1
+        self._open_shard()
+
+    def _open_shard(self) -> None:
+        self._shard_path = self._folder.joinpath(f"pack-{self._shard_number:05d}.bin")
+        # a large buffer groups the payloads of many articles into few writes
+        self._shard = open(self._shard_path, "ab", buffering=1024 ** 2)
+
+    def write(self, resource_id: int, file_name: str, article: ArticleInfo) -> Tuple[str, List[ArchiveEntry]]:
+        if self._shard.tell() >= self._shard_size:
+            self.sync()
+            self._shard.close()
+            self._shard_number += 1
+            self._open_shard()
+        offset = self._shard.tell()
+        entries = list()
+        payloads = list()
+        for kind, data in (("html", article.html), ("json", json.dumps(article, default=json_serial))):
+            payload = compress(self._compression, data.encode())
+            entries.append(ArchiveEntry(resource_id, article.id, kind, self._shard_path.name, offset, len(payload), self._compression.value))
+            payloads.append(payload)
+            offset += len(payload)
+        self._shard.write(b"".join(payloads))
+        return str(self._shard_path), entries
+
+    def sync(self) -> None:
+        self._shard.flush()
+        os.fsync(self._shard.fileno())
+
+    def close(self) -> None:
+        self.sync()
+        self._shard.close()
+
+
+def _fsync(path: pathlib.Path, flags: int) -> None:
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def create_archive_writer(mode: str, folder: pathlib.Path, compression: Compression, shard_size: int) -> ArchiveWriter:
+    match mode:
+        case "zip":
+            return ZipArchiveWriter(folder, compression)
+        case "pack":
+            return PackArchiveWriter(folder, compression, shard_size)
+        case _:
+            raise ValueError(f"unknown archive mode - {mode}")
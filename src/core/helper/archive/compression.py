@@ -0,0 +1,47 @@
+import zipfile
+import zlib
+from enum import Enum
+
+
+class Compression(Enum):
+    STORED = "stored"
+    DEFLATE = "deflate"
+    ZSTD = "zstd"
+
+
+def zip_compression(compression: Compression) -> int:
+    match compression:
+        case Compression.STORED:
+            return zipfile.ZIP_STORED
+        case Compression.DEFLATE:
+            return zipfile.ZIP_DEFLATED
+        case _:
+            raise ValueError(f"zip archives don't support {compression.value} compression, use the pack archive")
+
+
+def compress(compression: Compression, data: bytes) -> bytes:
+    match compression:
+        case Compression.STORED:
+            return data
+        case Compression.DEFLATE:
+            return zlib.compress(data)
+        case Compression.ZSTD:
+            return _zstandard().ZstdCompressor().compress(data)
+
+
+def decompress(compression: Compression, data: bytes) -> bytes:
+    match compression:
+        case Compression.STORED:
+            return bytes(data)
+        case Compression.DEFLATE:
+            return zlib.decompress(data)
+        case Compression.ZSTD:
+            return _zstandard().ZstdDecompressor().decompress(data)
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as err:
+        raise ImportError("zstd compression needs the zstandard package") from err
+    return zstandard
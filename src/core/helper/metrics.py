@@ -0,0 +1,181 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# upper bounds in seconds, the last bucket catches everything slower
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf"))
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+
+# resource of the code running in this context, for engines crawling several resources in one process
+_context_resource: ContextVar[Optional[str]] = ContextVar("metrics_resource", default=None)
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.buckets = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, buckets: List[int], sum_: float, count: int) -> None:
+        self.buckets = [own + other for own, other in zip(self.buckets, buckets)]
+        self.sum += sum_
+        self.count += count
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket the quantile falls into
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return bound
+        return 0.0
+
+
+class Metrics:
+    # counters and latency histograms of one process, labelled with the resource being crawled;
+    # workers ship snapshots to the parent, which merges them and exports the totals
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[Key, float] = dict()
+        self._histograms: Dict[Key, Histogram] = dict()
+        self._resource = ""
+
+    @property
+    def resource(self) -> str:
+        resource = _context_resource.get()
+        return resource if resource is not None else self._resource
+
+    @resource.setter
+    def resource(self, resource: str) -> None:
+        self._resource = resource
+
+    @contextmanager
+    def labelled(self, resource: str) -> Iterator[None]:
+        # labels what the current context (thread or asyncio task) measures, over the process wide resource
+        token = _context_resource.set(resource)
+        try:
+            yield
+        finally:
+            _context_resource.reset(token)
+
+    def inc(self, name: str, value: float = 1, resource: Optional[str] = None, **labels: str) -> None:
+        key = self._key(name, resource, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, resource: Optional[str] = None, **labels: str) -> None:
+        key = self._key(name, resource, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, resource: Optional[str] = None, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, resource, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        # plain lists and numbers, cheap to pickle through the articles queue
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), histogram.buckets, histogram.sum, histogram.count]
+                               for (name, labels), histogram in self._histograms.items()]
+            }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        with self._lock:
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(map(tuple, labels)))
+                self._counters[key] = self._counters.get(key, 0) + value
+            for name, labels, buckets, sum_, count in snapshot["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram()
+                histogram.merge(buckets, sum_, count)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def to_prometheus(self, elapsed: float) -> str:
+        lines = [f"crawl_run_seconds {elapsed}"]
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"crawl_{name}{_format_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                seen = 0
+                for bound, count in zip(BUCKETS, histogram.buckets):
+                    seen += count
+                    le = "+Inf" if bound == float("inf") else str(bound)
+                    lines.append(f"crawl_{name}_bucket{_format_labels(labels + (('le', le),))} {seen}")
+                lines.append(f"crawl_{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"crawl_{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self, elapsed: float) -> str:
+        # per resource: counters, latency summaries and fetched pages per second of the run
+        resources: Dict[str, Dict[str, Any]] = dict()
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                resource, rest = _split_resource(labels)
+                resources.setdefault(resource, dict())[name + rest] = value
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                resource, rest = _split_resource(labels)
+                resources.setdefault(resource, dict())[name + rest] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "mean": histogram.sum / histogram.count if histogram.count else 0,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99),
+                }
+        for values in resources.values():
+            values["pages_per_sec"] = values.get("pages_total", 0) / elapsed if elapsed > 0 else 0
+        return json.dumps({"elapsed_seconds": elapsed, "resources": resources}, indent=2)
+
+    def export(self, file_name: str, elapsed: float) -> None:
+        # a .json file gets the summary, anything else the prometheus text format (e.g. for node_exporter's textfile collector)
+        with open(file_name, "w") as file:
+            file.write(self.to_json(elapsed) if file_name.endswith(".json") else self.to_prometheus(elapsed))
+
+    def _key(self, name: str, resource: Optional[str], labels: Dict[str, str]) -> Key:
+        return name, (("resource", resource if resource is not None else self.resource),) + tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _split_resource(labels: Labels) -> Tuple[str, str]:
+    # the resource label, and the other labels folded into the metric name for the json summary
+    resource = dict(labels).get("resource", "")
+    rest = "".join(f"{{{name}={value}}}" for name, value in labels if name != "resource")
+    return resource, rest
+
+
+# one registry per process
+metrics = Metrics()
@@ -0,0 +1,41 @@
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Iterable, Iterator, TypeVar, Deque
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(func: Callable[[T], R], items: Iterable[T], workers: int, window: int = 0) -> Iterator[R]:
+    # results come back in the order of items, at most `window` calls are in flight or waiting to be consumed
+    window = max(window, workers)
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending: Deque[Future] = deque()
+    try:
+        for item in items:
+            # every call runs in a copy of the caller's context, so context labels (metrics) follow it
+            pending.append(executor.submit(contextvars.copy_context().run, func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def lookahead(func: Callable[[], R]) -> Iterator[R]:
+    # calls func again and again, the next call already runs while the caller consumes the current result
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        pending = executor.submit(contextvars.copy_context().run, func)
+        while True:
+            result = pending.result()
+            pending = executor.submit(contextvars.copy_context().run, func)
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,140 @@
+import time
+from typing import Dict, NamedTuple, Optional, List
+
+from src.core.entity import ArticleInfoShort, PageObservation
+from src.core.error import RequestError
+from src.core.helper.reactor import Reactor
+
+
+class PageRange(NamedTuple):
+    min_ts: float
+    max_ts: float
+
+
+class PageLocator:
+    # finds the listing page for a date on resources whose pages go back in time as the number grows
+    def __init__(self, reactor: Reactor, ranges: Optional[Dict[int, PageRange]] = None, max_page: int = 100000) -> None:
+        self._reactor = reactor
+        self._max_page = max_page
+        self._pages: Dict[int, list[ArticleInfoShort]] = dict()
+        # page -> timestamps seen on it, seeded from earlier observations
+        self.ranges: Dict[int, PageRange] = dict(ranges or dict())
+        self.requests = 0
+
+    def fetch(self, page: int) -> list[ArticleInfoShort]:
+        articles = self._pages.get(page)
+        if articles is None:
+            self.requests += 1
+            try:
+                articles = self._reactor.go_to_link(str(page))
+            except RequestError as err:
+                # most sites answer 404 past the last page; a failed probe must not pass for one,
+                # the search would start past the page and skip its articles
+                if not err.not_found():
+                    raise
+                articles = list()
+            self._pages[page] = articles = articles or list()
+            if articles:
+                timestamps = [article.timestamp for article in articles]
+                self.ranges[page] = PageRange(min(timestamps), max(timestamps))
+            else:
+                self.ranges.pop(page, None)
+        return articles
+
+    def observed(self) -> List[tuple[int, PageRange, int]]:
+        # pages fetched by this locator with their ranges and article counts
+        return [(page, self.ranges[page], len(articles)) for page, articles in self._pages.items() if articles]
+
+    def _reaches(self, page: int, ts: float) -> bool:
+        # monotone in page: the page holds something at or before ts, or lies past the end
+        self.fetch(page)
+        page_range = self.ranges.get(page)
+        return page_range is None or page_range.min_ts <= ts
+
+    def guess(self, ts: float) -> int:
+        # the known page that brackets ts, interpolated between the two nearest known pages
+        newer = max((page for page, page_range in self.ranges.items() if page_range.min_ts > ts), default=None)
+        older = min((page for page, page_range in self.ranges.items() if page_range.min_ts <= ts), default=None)
+        if newer is None:
+            return older or 1
+        if older is None:
+            return newer + 1
+        return _interpolate(newer, self.ranges[newer].min_ts, older, self.ranges[older].max_ts, ts)
+
+    def locate(self, ts: float, guess: Optional[int] = None) -> int:
+        # the first page that reaches ts: gallop from the guess until the answer is bracketed,
+        # then narrow the bracket by interpolating on page timestamps
+        page = max(1, guess if guess is not None else self.guess(ts))
+        step = 1
+        if self._reaches(page, ts):
+            low, high = 0, page
+            while high > 1:
+                probe = max(1, high - step)
+                if not self._reaches(probe, ts):
+                    low = probe
+                    break
+                high = probe
+                step *= 2
+        else:
+            low, high = page, None
+            while high is None:
+                probe = low + step
+                if probe > self._max_page:
+                    raise RequestError('date out of possible range')
+                if self._reaches(probe, ts):
+                    high = probe
+                else:
+                    low = probe
+                    step *= 2
+        bisect = False
+        while high - low > 1:
+            if bisect or low == 0 or high not in self.ranges:
+                probe = (low + high) // 2
+            else:
+                probe = _interpolate(low, self.ranges[low].min_ts, high, self.ranges[high].max_ts, ts)
+            width = high - low
+            if self._reaches(probe, ts):
+                high = probe
+            else:
+                low = probe
+            # falls back to halving for a step whenever interpolation didn't at least halve the bracket
+            bisect = (high - low) * 2 > width
+        return high
+
+
+class PageIndex:
+    # page observations of one resource kept across runs, new articles push old ones to higher pages,
+    # so every observation is moved by the number of pages published since it was made
+    def __init__(self, resource_id: int, observations: List[PageObservation]) -> None:
+        self.resource_id = resource_id
+        self.observations = observations
+        self.updated: List[PageObservation] = list()
+
+    def predict(self, now: float) -> Dict[int, PageRange]:
+        if not self.observations:
+            return dict()
+        # articles per second at the head of the listing, n articles on a page span n - 1 intervals
+        head = max(self.observations, key=lambda observation: observation.max_ts)
+        rate = max(head.size - 1, 1) / max(head.max_ts - head.min_ts, 1.0)
+        ranges = dict()
+        for observation in sorted(self.observations, key=lambda observation: observation.observed_at):
+            shift = round((now - observation.observed_at) * rate / max(observation.size, 1))
+            ranges[observation.page + shift] = PageRange(observation.min_ts, observation.max_ts)
+        return ranges
+
+    def locator(self, reactor: Reactor) -> PageLocator:
+        return PageLocator(reactor, self.predict(time.time()))
+
+    def update(self, locator: PageLocator) -> None:
+        now = time.time()
+        self.updated.extend(
+            PageObservation(self.resource_id, page, page_range.min_ts, page_range.max_ts, size, now)
+            for page, page_range, size in locator.observed()
+        )
+
+
+def _interpolate(newer: int, newer_ts: float, older: int, older_ts: float, ts: float) -> int:
+    if newer_ts <= older_ts:
+        return (newer + older) // 2
+    page = newer + round((older - newer) * (newer_ts - ts) / (newer_ts - older_ts))
+    return min(max(page, newer + 1), older - 1) if older - newer > 1 else older
@@ -1,4 +1,11 @@
 from .base_pager import BasePager
-from .selenium_pager import SeleniumPager
 from .selector_pager import SelectorPager
 from .simple_pager import SimplePager
+
+
+def __getattr__(name: str):
+    # SeleniumPager pulls in selenium, loaded on first use like the selenium drivers
+    if name == "SeleniumPager":
+        from .selenium_pager import SeleniumPager
+        return SeleniumPager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
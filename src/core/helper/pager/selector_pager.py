@@ -1,4 +1,6 @@
-from src.core.entity import ElementRecipe, ParserType, TagRecipe
+from typing import Optional
+
+from src.core.entity import CompiledRecipe, ElementRecipe, ParserType, TagRecipe
 from src.core.helper.request_driver import RequestDriver
 from .base_pager import BasePager
 
@@ -8,20 +10,25 @@ class SelectorPager(BasePager):
         self._next_page_recipe = next_page
         self._prev_page_recipe = prev_page
         self._driver = driver
+        # built per reactor, so compiled here and dropped with the pager instead of cached for good
+        self._pages_recipe = CompiledRecipe(ElementRecipe(tags={"next_page": next_page, "prev_page": prev_page}, parser=ParserType.HTML))
         self._next_page = None
         self._prev_page = None
 
     def set_pages(self, html: str) -> None:
-        pages = ElementRecipe(tags={"next_page": self._next_page_recipe, "prev_page": self._prev_page_recipe},
-                              parser=ParserType.HTML).parse_data(html)
+        pages = self._pages_recipe.parse_data(html)
         self._next_page, self._prev_page = pages.get("next_page"), pages.get("prev_page")
 
-    def get_next(self) -> str:
-        res = self._driver.get_resource(self._next_page, {})
-        self.set_pages(res)
-        return res
+    def get_next(self) -> Optional[str]:
+        return self._follow(self._next_page)
+
+    def get_prev(self) -> Optional[str]:
+        return self._follow(self._prev_page)
 
-    def get_prev(self) -> str:
-        res = self._driver.get_resource(self._prev_page, {})
+    def _follow(self, link: Optional[str]) -> Optional[str]:
+        # past the first or last page there is no link, nothing is fetched and the reactor reads no page as an empty one
+        if not link:
+            return None
+        res = self._driver.get_resource(link, {})
         self.set_pages(res)
         return res
@@ -11,6 +11,10 @@ class SimplePager(BasePager):
         self._next_page = None
         self._prev_page = None
 
+    @property
+    def next_page(self) -> int:
+        return self._next_page
+
     def set_pages(self, page: int) -> None:
         self._next_page, self._prev_page = page + 1, page - 1
 
@@ -20,6 +24,6 @@ class SimplePager(BasePager):
         return res
 
     def get_prev(self) -> str:
-        res = self._driver.get_resource(self._href.render(self._prev_page), {})
+        res = self._driver.get_resource(self._href.render(page=self._prev_page), {})
         self.set_pages(self._prev_page)
         return res
@@ -0,0 +1,98 @@
+import multiprocessing
+from concurrent.futures import Future
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.entity import ArticleInfo, ArticleInfoShort, ReactorSettings
+from src.core.helper.metrics import metrics
+
+# settings of every resource, set by the pool initializer
+_settings: List[ReactorSettings] = list()
+
+
+def _init_parser(settings: List[ReactorSettings]) -> None:
+    global _settings
+    _settings = settings
+    for resource_settings in _settings:
+        resource_settings.compile()
+
+
+def _parse(resource: int, method: str, name: str, size: int) -> Tuple[Any, Dict[str, Any]]:
+    page = SharedMemory(name)
+    try:
+        html = bytes(page.buf[:size]).decode("utf-8")
+    finally:
+        page.close()
+    metrics.reset()
+    metrics.resource = _settings[resource].href
+    result = getattr(_settings[resource], method)(html)
+    if isinstance(result, ArticleInfo):
+        # the parent still has the page, no need to pickle it back
+        result = result._replace(html="")
+    return result, metrics.snapshot()
+
+
+class ParsePool:
+    # parses pages in worker processes; a page travels through shared memory, only its name is pickled
+    def __init__(self, settings: List[ReactorSettings], processes: Optional[int] = None) -> None:
+        # workers attaching a page register it with the resource tracker, they have to share the one of
+        # this process, which forgets the page once it is unlinked here, instead of starting their own
+        resource_tracker.ensure_running()
+        # started right away, before the caller runs threads that could hold locks while forking
+        self._pool = multiprocessing.Pool(processes, initializer=_init_parser, initargs=(settings,))
+
+    def submit(self, resource: int, method: str, html: str) -> Future:
+        # method is parse_articles or parse_article of the resource's settings
+        data = html.encode("utf-8")
+        page = SharedMemory(create=True, size=max(len(data), 1))
+        page.buf[:len(data)] = data
+        future: Future = Future()
+        # running from the start, so a caller giving up can't cancel it under the pool's result thread
+        future.set_running_or_notify_cancel()
+
+        def release() -> None:
+            page.close()
+            page.unlink()
+
+        def done(result: Tuple[Any, Dict[str, Any]]) -> None:
+            release()
+            parsed, snapshot = result
+            metrics.merge(snapshot)
+            future.set_result(parsed._replace(html=html) if isinstance(parsed, ArticleInfo) else parsed)
+
+        def failed(err: BaseException) -> None:
+            release()
+            future.set_exception(err)
+
+        self._pool.apply_async(_parse, (resource, method, page.name, len(data)), callback=done, error_callback=failed)
+        return future
+
+    def parser(self, resource: int) -> 'PooledParser':
+        return PooledParser(self, resource)
+
+    def close(self) -> None:
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self) -> 'ParsePool':
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        if type_ is None:
+            self.close()
+        else:
+            self._pool.terminate()
+
+
+class PooledParser:
+    # the parser a Reactor of one resource uses, blocks its thread until a worker parsed the page
+    def __init__(self, pool: ParsePool, resource: int) -> None:
+        self._pool = pool
+        self._resource = resource
+
+    def parse_articles(self, html: str) -> List[ArticleInfoShort]:
+        return self._pool.submit(self._resource, "parse_articles", html).result()
+
+    def parse_article(self, html: str) -> ArticleInfo:
+        return self._pool.submit(self._resource, "parse_article", html).result()
@@ -0,0 +1,96 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+STAGES = ("fetch", "list parse", "short-info parse", "article parse", "filters", "persist")
+
+
+class StageProfiler:
+    # one cProfile per pipeline stage, switched as the crawl enters and leaves stages;
+    # a nested stage (filters inside a parse) pauses the outer one, so every stage reports its own time only
+    def __init__(self) -> None:
+        self.profiles: Dict[str, cProfile.Profile] = {stage: cProfile.Profile() for stage in STAGES}
+        self.seconds: Dict[str, float] = {stage: 0.0 for stage in STAGES}
+        # (recipe tag, selector) -> [seconds, evaluations]
+        self.selectors: Dict[Tuple[str, str], List[float]] = dict()
+        self.thread: Optional[threading.Thread] = None
+        self._stack: List[Tuple[str, float]] = list()
+
+    def __enter__(self) -> 'StageProfiler':
+        global _active
+        self.thread = threading.current_thread()
+        _active = self
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        global _active
+        _active = None
+
+    def push(self, stage: str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            outer, started = self._stack[-1]
+            self.profiles[outer].disable()
+            self.seconds[outer] += now - started
+        self._stack.append((stage, now))
+        self.profiles[stage].enable()
+
+    def pop(self) -> None:
+        stage, started = self._stack.pop()
+        self.profiles[stage].disable()
+        now = time.perf_counter()
+        self.seconds[stage] += now - started
+        if self._stack:
+            outer, _ = self._stack[-1]
+            self._stack[-1] = (outer, now)
+            self.profiles[outer].enable()
+
+    def add_selector(self, tag: str, selector: str, seconds: float) -> None:
+        timing = self.selectors.setdefault((tag, selector), [0.0, 0])
+        timing[0] += seconds
+        timing[1] += 1
+
+    def report(self, top: int = 10, dominant_share: float = 0.3) -> str:
+        out = io.StringIO()
+        total = sum(self.seconds.values()) or 1
+        for stage in STAGES:
+            out.write(f"== {stage}: {self.seconds[stage]:.3f}s ({self.seconds[stage] / total:.0%})\n")
+            if self.profiles[stage].getstats():
+                stats = pstats.Stats(self.profiles[stage], stream=out)
+                stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+        selectors_total = sum(seconds for seconds, _ in self.selectors.values()) or 1
+        out.write("== selectors\n")
+        for (tag, selector), (seconds, count) in sorted(self.selectors.items(), key=lambda item: -item[1][0]):
+            share = seconds / selectors_total
+            flag = "  <- dominates" if share >= dominant_share else ""
+            out.write(f"{seconds:9.3f}s {share:5.0%} {count:6} x {tag}: {selector}{flag}\n")
+        return out.getvalue()
+
+
+_active: Optional[StageProfiler] = None
+
+
+def profiling() -> bool:
+    # hooks stay cheap when nothing is profiled; work on other threads is not attributed
+    return _active is not None and threading.current_thread() is _active.thread
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    if not profiling():
+        yield
+        return
+    _active.push(name)
+    try:
+        yield
+    finally:
+        _active.pop()
+
+
+def add_selector(tag: str, selector: str, seconds: float) -> None:
+    if profiling():
+        _active.add_selector(tag, selector, seconds)
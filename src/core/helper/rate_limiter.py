@@ -0,0 +1,87 @@
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Tuple
+
+
+def _gcra(stored_tat: float, now: float, interval: float, tolerance: float, reserve: bool) -> Tuple[float, float]:
+    # generic cell rate algorithm: a request conforms when it comes no earlier than tat - tolerance,
+    # returns the new theoretical arrival time and how long the caller has to wait
+    tat = max(stored_tat, now)
+    wait = max(0.0, tat - tolerance - now)
+    if wait > 0 and not reserve:
+        return stored_tat, wait
+    return tat + interval, wait
+
+
+class RateLimiter:
+    def __init__(self, key: str, hour_limit: int, burst: int = 1) -> None:
+        self._key = key
+        self._interval = 3600 / hour_limit
+        self._tolerance = self._interval * (max(burst, 1) - 1)
+
+    def _update(self, reserve: bool) -> float:
+        pass
+
+    def acquire(self) -> float:
+        # takes a slot (possibly in the future) and sleeps until it comes, no lock is held while sleeping
+        wait = self._update(True)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self) -> float:
+        # takes a slot only if one is free right now, otherwise returns the time to wait before retrying
+        return self._update(False)
+
+
+class MemoryRateLimiter(RateLimiter):
+    # shared by every limiter with the same key inside one process
+    _tats: Dict[str, float] = dict()
+    _lock = threading.Lock()
+
+    def _update(self, reserve: bool) -> float:
+        with self._lock:
+            tat, wait = _gcra(self._tats.get(self._key, 0.0), time.time(), self._interval, self._tolerance, reserve)
+            self._tats[self._key] = tat
+        return wait
+
+
+class SqliteRateLimiter(RateLimiter):
+    # shared by every process and thread that uses the same database file
+    def __init__(self, file_name: pathlib.Path, key: str, hour_limit: int, burst: int = 1) -> None:
+        super().__init__(key, hour_limit, burst)
+        self._file_name = file_name
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections can't cross threads or forks, so every thread of every process opens its own
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self._file_name, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key VARCHAR(255) PRIMARY KEY,
+                tat REAL
+            );
+            ''')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def _update(self, reserve: bool) -> float:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (self._key,)).fetchone()
+            tat, wait = _gcra(row[0] if row else 0.0, time.time(), self._interval, self._tolerance, reserve)
+            conn.execute("""
+            INSERT INTO rate_limits (key, tat) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET tat = excluded.tat
+            """, (self._key, tat))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
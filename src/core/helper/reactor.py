@@ -1,46 +1,193 @@
+import itertools
+from contextlib import AbstractContextManager, nullcontext
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable, Iterator, Optional, Protocol
+from urllib.parse import urlparse
 
 from jinja2 import Template
 
+from src.const import RATE_LIMIT_DB_FILE, HTTP_CACHE_DB_FILE, HTTP_CACHE_MAX_SIZE, SELENIUM_TABS
 from src.core.entity import ReactorSettings, DriverType, ArticleInfoShort, PagerType, ArticleInfo
-from src.core.helper.pager import BasePager, SimplePager, SelectorPager, SeleniumPager
+from src.core.error import RequestError
+from src.core.helper.ordered_executor import ordered_map, lookahead
+from src.core.helper.profiling import stage
+from src.core.helper.pager import BasePager, SimplePager, SelectorPager
+from src.core.helper.rate_limiter import SqliteRateLimiter
 from src.core.helper.req_inspector import RequestInspector
-from src.core.helper.request_driver import RequestDriver, SeleniumDriver
+from src.core.helper.request_driver import BaseDriver, RequestDriver, HttpCache, RecordingDriver, ReplayDriver, \
+    create_session
+
+
+class PageParser(Protocol):
+    def parse_articles(self, html: str) -> list[ArticleInfoShort]:
+        ...
+
+    def parse_article(self, html: str) -> ArticleInfo:
+        ...
 
 
 class Reactor:
-    def __init__(self, settings: ReactorSettings):
-        self._inspector = RequestInspector(settings.hour_limit)
+    def __init__(
+            self,
+            settings: ReactorSettings,
+            parser: Optional[PageParser] = None,
+            connections: Optional[AbstractContextManager] = None
+    ):
+        # keyed by host so every resource and pool worker hitting the same site shares one budget
+        limiter = SqliteRateLimiter(RATE_LIMIT_DB_FILE, urlparse(settings.href).hostname, settings.hour_limit, settings.burst_limit)
+        self._inspector = RequestInspector(settings.hour_limit, limiter=limiter)
         self._settings = settings
+        self._settings.compile()
+        # the settings parse in this thread, a pooled parser hands the pages to other processes
+        self._parser: PageParser = parser if parser is not None else settings
+        # held around every article fetch, a semaphore shared by processes caps the connections they open together
+        self._connections = connections if connections is not None else nullcontext()
         self._href = Template(settings.href)
-        self._list_driver = RequestDriver(self._inspector) if settings.list_driver == DriverType.REQUEST else SeleniumDriver(self._inspector)
-        self._page_driver = RequestDriver(self._inspector) if settings.list_driver == DriverType.REQUEST else SeleniumDriver(self._inspector)
-        self._pager: BasePager
+        # list and article pages share one keep-alive pool, sized for the concurrent article fetches
+        self._session = create_session(settings.page_workers + settings.list_workers, self._inspector.get_headers())
+        self._cache = HttpCache(HTTP_CACHE_DB_FILE, HTTP_CACHE_MAX_SIZE) if HTTP_CACHE_MAX_SIZE > 0 else None
+        page_driver_type = settings.page_driver or settings.list_driver
+        # the selenium pager clicks through the browser page itself, so its driver is never wrapped for recording
+        self._list_driver = self._create_driver(
+            settings.list_driver, settings.list_cache_ttl, settings.list_ready_selector(),
+            hold=True, record=settings.pager_type != PagerType.SELENIUM
+        )
+        self._page_driver = self._create_driver(page_driver_type, settings.page_cache_ttl, settings.page_ready_selector())
+        # every article fetch borrows its own browser, so selenium runs as many as the browser pool holds
+        self._page_workers = settings.page_workers
+        if page_driver_type == DriverType.SELENIUM:
+            from src.core.helper.request_driver import get_browser_pool
+            self._page_workers = min(settings.page_workers, get_browser_pool(self._inspector.get_headers(), settings.scrape_profile).size)
+        self._page_tabs = SELENIUM_TABS if page_driver_type == DriverType.SELENIUM else 1
+        self._list_workers = settings.list_workers if settings.list_driver != DriverType.SELENIUM else 1
+        self._pager: BasePager = BasePager()
 
         if settings.pager_type == PagerType.SELECTOR:
             self._pager = SelectorPager(settings.next_page, settings.prev_page, self._list_driver)
         elif settings.pager_type == PagerType.SIMPLE:
             self._pager = SimplePager(self._list_driver, self._href)
         elif settings.pager_type == PagerType.SELENIUM:
+            from src.core.helper.pager import SeleniumPager
             self._pager = SeleniumPager(settings.next_page, settings.prev_page, self._list_driver)
 
+    def _create_driver(
+            self,
+            driver_type: DriverType,
+            cache_ttl: int,
+            ready_selector: Optional[str],
+            hold: bool = False,
+            record: bool = True
+    ) -> BaseDriver:
+        if driver_type == DriverType.REPLAY:
+            return ReplayDriver(
+                self._inspector, self._settings.replay_archive, self._settings.replay_latency, self._settings.replay_bandwidth
+            )
+        if driver_type == DriverType.REQUEST:
+            driver = RequestDriver(self._inspector, self._session, cache=self._cache, cache_ttl=cache_ttl)
+        else:
+            from src.core.helper.request_driver import SeleniumDriver
+            driver = SeleniumDriver(
+                self._inspector, hold=hold, profile=self._settings.scrape_profile, ready_selector=ready_selector
+            )
+        if self._settings.record_archive is not None and record:
+            return RecordingDriver(driver, self._settings.record_archive)
+        return driver
+
     def go_to_link(self, page: Any, set_pages=False) -> list[ArticleInfoShort]:
-        resp = self._list_driver.get_resource(self._href.render(page=page), {})
+        with stage("fetch"):
+            resp = self._list_driver.get_resource(self._href.render(page=page), {})
         if set_pages:
-            self._pager.set_pages(resp)
-        return self._settings.parse_articles(resp)
+            # a simple pager counts page numbers, the others read their links from the page
+            self._pager.set_pages(int(page) if self._settings.pager_type == PagerType.SIMPLE else resp)
+        return self._parser.parse_articles(resp)
+
+    def list_page(self, page: int) -> list[ArticleInfoShort]:
+        try:
+            return self.go_to_link(str(page))
+        except RequestError as err:
+            # most sites answer 404 past the last page; any other error fails the resource,
+            # a listing cut short must not read as complete or the watermark would skip the rest
+            if not err.not_found():
+                raise
+            return list()
+
+    def next_pages(self, last_page: Optional[int] = None) -> Iterator[list[ArticleInfoShort]]:
+        # listing pages after the pager's current one, in order, until an empty page or last_page;
+        # numbered pages are fetched list_workers at a time, linked pages one ahead of the caller
+        if self._settings.pager_type == PagerType.SIMPLE:
+            first = self._pager.next_page
+            pages = itertools.count(first) if last_page is None else range(first, last_page + 1)
+            articles_pages = ordered_map(self.list_page, pages, self._list_workers)
+        elif self._settings.list_workers > 1:
+            articles_pages = lookahead(self.page_next)
+        else:
+            articles_pages = (self.page_next() for _ in itertools.count())
+        try:
+            for articles in articles_pages:
+                if not articles:
+                    return
+                yield articles
+        finally:
+            articles_pages.close()
 
     def get_pager(self) -> BasePager:
         return self._pager
 
+    def end_listing(self) -> None:
+        # a selenium listing holds a browser of the pool, the article fetches of a reused reactor don't need it
+        if self._settings.list_driver == DriverType.SELENIUM:
+            self._list_driver.close()
+
+    def get_page_workers(self) -> int:
+        return self._page_workers
+
     def article_page(self, url: str) -> ArticleInfo:
-        return self._settings.parse_article(self._page_driver.get_resource(url, {}))
+        return self._parser.parse_article(self.fetch_article(url))
+
+    def fetch_article(self, url: str) -> str:
+        with self._connections, stage("fetch"):
+            return self._page_driver.get_resource(url, {})
+
+    async def fetch_article_async(self, url: str) -> str:
+        # paced on the event loop, the blocking driver runs on a thread of the loop's executor
+        return await self._inspector.run_locked(self.fetch_article, url)
+
+    def article_pages(self, urls: Iterable[str]) -> Iterator[ArticleInfo]:
+        if self._page_tabs <= 1:
+            return ordered_map(self.article_page, urls, self._page_workers)
+        return self._article_pages_in_tabs(urls)
+
+    def _article_pages_in_tabs(self, urls: Iterable[str]) -> Iterator[ArticleInfo]:
+        urls = iter(urls)
+        batches = iter(lambda: list(itertools.islice(urls, self._page_tabs)), [])
+        for pages in ordered_map(self._fetch_articles, batches, self._page_workers):
+            for page in pages:
+                yield self._parser.parse_article(page)
+
+    def _fetch_articles(self, urls: list[str]) -> list[str]:
+        with self._connections:
+            return self._page_driver.get_resources(urls)
 
     def page_next(self) -> list[ArticleInfoShort]:
-        return self._settings.parse_articles(self._pager.get_next())
+        with stage("fetch"):
+            page = self._pager.get_next()
+        return self._parse_page(page)
 
     def page_prev(self) -> list[ArticleInfoShort]:
-        return self._settings.parse_articles(self._pager.get_prev())
+        with stage("fetch"):
+            page = self._pager.get_prev()
+        return self._parse_page(page)
+
+    def close(self) -> None:
+        # gives pooled browsers back, the keep-alive connections go with the session
+        for driver in (self._list_driver, self._page_driver):
+            close = getattr(driver, "close", None)
+            if close is not None:
+                close()
+        self._session.close()
+
+    def _parse_page(self, resp: Any) -> list[ArticleInfoShort]:
+        # no page (no pager, or no link to follow) reads as an empty one
+        return self._parser.parse_articles(resp) if resp else list()
 
 
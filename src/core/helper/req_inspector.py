@@ -1,36 +1,51 @@
-import threading
-import time
-from typing import Optional, Dict
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Callable, Optional, Dict, TypeVar
+
+from src.core.helper.metrics import metrics
+from src.core.helper.rate_limiter import RateLimiter, MemoryRateLimiter
+
+R = TypeVar("R")
+
+# set while a call runs on a request slot the event loop already took for it
+_slot_taken: ContextVar[bool] = ContextVar("slot_taken", default=False)
 
 
 class RequestInspector:
-    def __init__(self, req_hour_rate=720000, headers: Optional[Dict[str, str]] = None) -> None:
+    def __init__(self, req_hour_rate=720000, headers: Optional[Dict[str, str]] = None, limiter: Optional[RateLimiter] = None) -> None:
         headers = dict((k.strip().lower(), v) for k, v in (headers or dict()).items())
         if 'user-agent' not in headers:
             headers['user-agent'] = 'Mozilla/5.0 (Windows NT 10.0; rv:91.0) Gecko/20100101 Firefox/91.0'
         self._hour_limit = req_hour_rate
-        self._last_parsed_time = time.time()
-        self._lock = threading.Lock()
-        self._minute_rate = int(req_hour_rate / 60)
-        self._delta = 0
+        self._limiter = limiter if limiter is not None else MemoryRateLimiter(str(id(self)), req_hour_rate)
         self._headers = headers
 
     def get_headers(self) -> Dict[str, str]:
         return self._headers
 
-    def lock_request(self) -> None:
-        with self._lock:
-            self._delta += 1
-            now = time.time()
-            time_delta = 60 - (now - self._last_parsed_time)
-            if time_delta < 60:
-                if self._delta >= self._minute_rate:
-                    time.sleep(time_delta)
-                    self._last_parsed_time = now + time_delta
-                    self._delta = 0
-            else:
-                self._last_parsed_time = now
-                self._delta = 0
+    def lock_request(self) -> float:
+        if _slot_taken.get():
+            return 0.0
+        wait = self._limiter.acquire()
+        metrics.observe("throttle_seconds", wait)
+        return wait
+
+    def try_lock_request(self) -> float:
+        return self._limiter.try_acquire()
+
+    async def run_locked(self, func: Callable[..., R], *args: Any) -> R:
+        # waits for the request slot on the event loop instead of sleeping in a thread,
+        # the thread then only does the blocking I/O of func
+        waited = 0.0
+        while (wait := self.try_lock_request()) > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        metrics.observe("throttle_seconds", waited)
+        token = _slot_taken.set(True)
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            _slot_taken.reset(token)
 
     # def request_get(self, url: str, req_args: Dict[str, str], driver: BaseDriver) -> str:
     #     self._lock_request()
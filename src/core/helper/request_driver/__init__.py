@@ -1,3 +1,19 @@
 from .base_driver import BaseDriver
-from .request_driver import RequestDriver
-from .selenium_driver import SeleniumDriver
+from .http_cache import HttpCache
+from .replay_driver import Exchange, RecordingDriver, ReplayDriver, load_exchanges
+from .request_driver import RequestDriver, create_session
+
+# selenium takes a good part of a second to import, it loads with the first selenium resource
+_selenium_names = {
+    "BrowserPool": ".browser_pool",
+    "BrowserSession": ".browser_pool",
+    "get_browser_pool": ".browser_pool",
+    "SeleniumDriver": ".selenium_driver",
+}
+
+
+def __getattr__(name: str):
+    if name in _selenium_names:
+        import importlib
+        return getattr(importlib.import_module(_selenium_names[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,255 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from multiprocessing import util
+from typing import Callable, Dict, Hashable, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
+
+from src.const import SELENIUM_REMOTE_DRIVER, SELENIUM_POOL_SIZE, SELENIUM_MAX_PAGES, SELENIUM_PAGE_TIMEOUT, \
+    SELENIUM_LEASE_TIMEOUT
+from src.core.entity.scrape_profile import ScrapeProfile
+from src.core.error import RequestError
+
+
+class BrowserSession:
+    def __init__(self, driver: webdriver.Remote, tab_setup: Optional[Callable[[webdriver.Remote], None]] = None) -> None:
+        self.driver = driver
+        # applied to every tab the session opens, devtools settings do not carry over to new tabs
+        self._tab_setup = tab_setup
+        self.pages = 0
+        self.broken = False
+
+    def get(self, url: str, ready_selector: Optional[str] = None, timeout: float = 0) -> str:
+        self.pages += 1
+        self.driver.get(url)
+        self.wait_ready(ready_selector, timeout)
+        return self.get_data()
+
+    def wait_ready(self, ready_selector: Optional[str], timeout: float) -> None:
+        # the selector shows up long before a page finishes loading; a page without it is returned as it is,
+        # the recipe decides what an empty page means
+        if ready_selector is None or timeout <= 0:
+            return
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                expected_conditions.presence_of_element_located((By.CSS_SELECTOR, ready_selector))
+            )
+        except TimeoutException:
+            pass
+
+    def get_many(self, urls: List[str], ready_selector: Optional[str] = None, timeout: float = 0) -> List[str]:
+        # every url loads in its own tab at the same time, results come back in the order of urls
+        main = self.driver.current_window_handle
+        tabs = list()
+        for url in urls:
+            self.driver.switch_to.new_window("tab")
+            tabs.append(self.driver.current_window_handle)
+            if self._tab_setup is not None:
+                self._tab_setup(self.driver)
+            self.driver.execute_script("window.location.href = arguments[0]", url)
+        self.pages += len(urls)
+        try:
+            res = list()
+            for tab in tabs:
+                self.driver.switch_to.window(tab)
+                WebDriverWait(self.driver, SELENIUM_PAGE_TIMEOUT).until(
+                    lambda driver: driver.execute_script("return document.readyState") != "loading"
+                )
+                self.wait_ready(ready_selector, timeout)
+                res.append(self.get_data())
+            return res
+        finally:
+            for tab in tabs:
+                self.driver.switch_to.window(tab)
+                self.driver.close()
+            self.driver.switch_to.window(main)
+
+    def get_data(self) -> str:
+        return self.driver.find_element(by=By.TAG_NAME, value="html").get_attribute("innerHTML")
+
+    def is_alive(self) -> bool:
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except WebDriverException:
+            return False
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        except WebDriverException:
+            pass
+
+
+class BrowserPool:
+    def __init__(
+            self,
+            factory: Callable[[], webdriver.Remote],
+            size: int = SELENIUM_POOL_SIZE,
+            max_pages: int = SELENIUM_MAX_PAGES,
+            tab_setup: Optional[Callable[[webdriver.Remote], None]] = None
+    ) -> None:
+        self._factory = factory
+        self._tab_setup = tab_setup
+        self._size = size
+        self._max_pages = max_pages
+        self._idle: "queue.LifoQueue[BrowserSession]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._started = 0
+        # drivers keeping a session for their whole life (listings), each one gets a browser on top of size
+        self._holders = 0
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        # browsers for borrowers, holders come on top
+        return self._size
+
+    def add_holder(self) -> None:
+        with self._lock:
+            self._holders += 1
+
+    def remove_holder(self) -> None:
+        with self._lock:
+            self._holders -= 1
+
+    def warm(self) -> None:
+        # starts the missing sessions side by side, a browser takes seconds to come up
+        with self._lock:
+            missing = self._size - self._started
+            self._started += missing
+        if missing <= 0:
+            return
+        with ThreadPoolExecutor(max_workers=missing) as executor:
+            futures = [executor.submit(self._start) for _ in range(missing)]
+        for future in futures:
+            if future.exception() is None:
+                self._idle.put(future.result())
+            else:
+                with self._lock:
+                    self._started -= 1
+
+    def lease(self, timeout: float = SELENIUM_LEASE_TIMEOUT) -> BrowserSession:
+        # an idle session when there is one, a new one while the pool is not full, otherwise waits for a return
+        with self._lock:
+            start = self._idle.empty() and self._started < self._size + self._holders
+            if start:
+                self._started += 1
+        if start:
+            try:
+                return self._start()
+            except Exception:
+                with self._lock:
+                    self._started -= 1
+                raise
+        try:
+            session = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise RequestError(f"no browser came free in {timeout}s, all {self._started} are leased") from None
+        if session.is_alive():
+            return session
+        session.quit()
+        return self._replace()
+
+    def release(self, session: BrowserSession) -> None:
+        if self._closed:
+            session.quit()
+            return
+        with self._lock:
+            # a holder left, its browser goes with it
+            shrink = self._started > self._size + self._holders
+            if shrink:
+                self._started -= 1
+        if shrink:
+            session.quit()
+            return
+        if session.broken or session.pages >= self._max_pages:
+            # browsers grow with every page they load, a fresh one is cheaper than a slow one
+            session.quit()
+            try:
+                session = self._replace()
+            except Exception:
+                return
+        self._idle.put(session)
+
+    def close(self) -> None:
+        self._closed = True
+        while not self._idle.empty():
+            self._idle.get().quit()
+
+    def _replace(self) -> BrowserSession:
+        try:
+            return self._start()
+        except Exception:
+            with self._lock:
+                self._started -= 1
+            raise
+
+    def _start(self) -> BrowserSession:
+        driver = self._factory()
+        if self._tab_setup is not None:
+            self._tab_setup(driver)
+        return BrowserSession(driver, self._tab_setup)
+
+
+def _remote_driver(headers: Dict[str, str], profile: ScrapeProfile) -> webdriver.Remote:
+    options = webdriver.ChromeOptions()
+    for header in headers:
+        options.add_argument(f'--header="{header}:{headers[header]}"')
+    if profile.headless:
+        options.add_argument("--headless=new")
+    options.page_load_strategy = profile.page_load_strategy
+    if "image" in profile.blocked_resources:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if profile.blocked_domains:
+        options.add_argument(f"--host-resolver-rules={profile.host_resolver_rules()}")
+    return webdriver.Remote(command_executor=SELENIUM_REMOTE_DRIVER, options=options)
+
+
+def _block_urls(driver: webdriver.Remote, urls: List[str]) -> None:
+    try:
+        driver.execute("executeCdpCommand", {"cmd": "Network.enable", "params": {}})
+        driver.execute("executeCdpCommand", {"cmd": "Network.setBlockedURLs", "params": {"urls": urls}})
+    except WebDriverException:
+        # a grid without cdp passthrough still gets the image pref and the resolver rules
+        pass
+
+
+_pools: Dict[Hashable, BrowserPool] = dict()
+_pools_lock = threading.Lock()
+# a forked child starts without pools, the sessions it inherited belong to the parent
+os.register_at_fork(after_in_child=_pools.clear)
+
+
+def get_browser_pool(headers: Optional[Dict[str, str]] = None, profile: ScrapeProfile = ScrapeProfile()) -> BrowserPool:
+    # one pool per process and browser profile, shared by every selenium resource the process runs
+    headers = dict(headers or dict())
+    key = (tuple(sorted(headers.items())), profile)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            if not _pools:
+                # atexit never runs in pool and process children, they leave through os._exit;
+                # multiprocessing runs its finalizers there on a clean exit, and from atexit in the main process
+                util.Finalize(None, close_browser_pools, exitpriority=10)
+            blocked_urls = profile.blocked_urls()
+            pool = _pools[key] = BrowserPool(
+                lambda: _remote_driver(headers, profile),
+                tab_setup=partial(_block_urls, urls=blocked_urls) if blocked_urls else None
+            )
+            pool.warm()
+    return pool
+
+
+def close_browser_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,101 @@
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+import zlib
+from typing import NamedTuple, Optional, Dict
+from urllib.parse import urlencode
+
+
+class CachedResponse(NamedTuple):
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def validators(self) -> Dict[str, str]:
+        headers = dict()
+        if self.etag is not None:
+            headers["if-none-match"] = self.etag
+        if self.last_modified is not None:
+            headers["if-modified-since"] = self.last_modified
+        return headers
+
+
+def cache_key(url: str, req_args: Dict[str, str]) -> str:
+    return f"{url}?{urlencode(sorted(req_args.items()))}" if req_args else url
+
+
+class HttpCache:
+    # eviction needs a full scan of sizes, so it runs once per this many writes
+    _EVICT_EVERY = 64
+
+    def __init__(self, file_name: pathlib.Path, max_size: int) -> None:
+        self._file_name = file_name
+        self._max_size = max_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections can't cross threads or forks, so every thread of every process opens its own
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self._file_name, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key VARCHAR(3000) PRIMARY KEY,
+                body BLOB,
+                etag VARCHAR(255),
+                last_modified VARCHAR(255),
+                stored_at REAL,
+                accessed_at REAL,
+                size INTEGER
+            );
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS http_cache_accessed_at ON http_cache(accessed_at)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        conn = self._connection()
+        row = conn.execute("SELECT body, etag, last_modified, stored_at FROM http_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE http_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return CachedResponse(zlib.decompress(row[0]).decode(), row[1], row[2], row[3])
+
+    def put(self, key: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        data = zlib.compress(body.encode())
+        now = time.time()
+        self._connection().execute("""
+        INSERT INTO http_cache (key, body, etag, last_modified, stored_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET
+            body = excluded.body,
+            etag = excluded.etag,
+            last_modified = excluded.last_modified,
+            stored_at = excluded.stored_at,
+            accessed_at = excluded.accessed_at,
+            size = excluded.size
+        """, (key, data, etag, last_modified, now, now, len(data)))
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self._EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def refresh(self, key: str) -> None:
+        # the server answered 304, the stored body is valid for another ttl
+        now = time.time()
+        self._connection().execute("UPDATE http_cache SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+
+    def evict(self) -> None:
+        # keeps the most recently used entries that fit into max_size, drops the rest
+        self._connection().execute("""
+        DELETE FROM http_cache WHERE key IN (
+            SELECT key FROM (
+                SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC) AS kept_size FROM http_cache
+            ) WHERE kept_size > ?
+        )
+        """, (self._max_size,))
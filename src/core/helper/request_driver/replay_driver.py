@@ -0,0 +1,124 @@
+import functools
+import gzip
+import json
+import os
+import pathlib
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from src.core.error import RequestError
+from src.core.helper.metrics import metrics
+from src.core.helper.req_inspector import RequestInspector
+from src.core.helper.request_driver.base_driver import BaseDriver
+from src.core.helper.request_driver.http_cache import cache_key
+
+
+class Exchange(NamedTuple):
+    url: str
+    params: Dict[str, str]
+    # seconds the live request took
+    elapsed: float
+    body: Optional[str]
+    # message of the RequestError the live request raised, None when it succeeded
+    error: Optional[str]
+    # its status code, None for errors without a response
+    status: Optional[int] = None
+
+
+class RecordingDriver(BaseDriver):
+    # passes every request on to the wrapped driver and appends the exchange to a gzip jsonl archive
+    def __init__(self, driver: BaseDriver, archive_file: pathlib.Path) -> None:
+        self._driver = driver
+        self._archive_file = archive_file
+
+    def get_resource(self, url: str, req_args: Dict[str, str]) -> str:
+        started = time.perf_counter()
+        try:
+            body = self._driver.get_resource(url, req_args)
+        except RequestError as err:
+            self._append(Exchange(url, req_args, time.perf_counter() - started, None, str(err), err.status))
+            raise
+        self._append(Exchange(url, req_args, time.perf_counter() - started, body, None))
+        return body
+
+    def get_resources(self, urls: List[str]) -> List[str]:
+        # a batch of tabs loads together, every page is recorded with its share of the batch's time;
+        # a batch that fails has no page of its own, all of its urls are recorded with the error
+        started = time.perf_counter()
+        try:
+            bodies = self._driver.get_resources(urls)
+        except RequestError as err:
+            elapsed = (time.perf_counter() - started) / max(len(urls), 1)
+            for url in urls:
+                self._append(Exchange(url, dict(), elapsed, None, str(err), err.status))
+            raise
+        elapsed = (time.perf_counter() - started) / max(len(urls), 1)
+        for url, body in zip(urls, bodies):
+            self._append(Exchange(url, dict(), elapsed, body, None))
+        return bodies
+
+    def close(self) -> None:
+        close = getattr(self._driver, "close", None)
+        if close is not None:
+            close()
+
+    def _append(self, exchange: Exchange) -> None:
+        # every exchange is its own gzip member written with a single O_APPEND write,
+        # so threads and pool workers can record into one archive without a lock
+        data = gzip.compress((json.dumps(exchange._asdict()) + "\n").encode("utf-8"))
+        fd = os.open(self._archive_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+
+class ReplayDriver(BaseDriver):
+    # serves recorded exchanges, latency None replays the recorded timing, bandwidth is bytes per second (0 - unlimited)
+    def __init__(
+            self,
+            inspector: RequestInspector,
+            archive_file: pathlib.Path,
+            latency: Optional[float] = None,
+            bandwidth: float = 0
+    ) -> None:
+        self._inspector = inspector
+        self._exchanges = load_exchanges(pathlib.Path(archive_file))
+        self._latency = latency
+        self._bandwidth = bandwidth
+
+    def get_resource(self, url: str, req_args: Dict[str, str]) -> str:
+        self._inspector.lock_request()
+        metrics.inc("pages_total")
+        metrics.inc("requests_total", driver="replay")
+        exchange = self._exchanges.get(cache_key(url, req_args))
+        if exchange is None:
+            metrics.inc("request_errors_total", driver="replay")
+            # answered like a live site answers a page that isn't there
+            raise RequestError(f"error while getting resource {url} - not recorded", 404)
+        size = len(exchange.body.encode("utf-8")) if exchange.body is not None else 0
+        delay = exchange.elapsed if self._latency is None else self._latency
+        if self._bandwidth > 0:
+            delay += size / self._bandwidth
+        time.sleep(delay)
+        metrics.observe("fetch_seconds", delay, driver="replay")
+        if exchange.error is not None:
+            metrics.inc("request_errors_total", driver="replay")
+            raise RequestError(exchange.error, exchange.status)
+        metrics.inc("bytes_downloaded_total", size)
+        return exchange.body
+
+    def get_resources(self, urls: List[str]) -> List[str]:
+        # one page after another, each recorded with its share of its batch's time, so a batch replays as long as it took
+        return [self.get_resource(url, dict()) for url in urls]
+
+
+@functools.lru_cache(maxsize=None)
+def load_exchanges(archive_file: pathlib.Path) -> Dict[str, Exchange]:
+    # read once per process, the latest recording of a url wins
+    exchanges = dict()
+    with gzip.open(archive_file, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            exchange = Exchange(**json.loads(line))
+            exchanges[cache_key(exchange.url, exchange.params)] = exchange
+    return exchanges
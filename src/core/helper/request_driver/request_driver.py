@@ -1,20 +1,82 @@
-from typing import Dict
+import time
+from typing import Dict, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 
+from src.const import REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT
 from src.core.error import RequestError
+from src.core.helper.metrics import metrics
 from src.core.helper.req_inspector import RequestInspector
 from src.core.helper.request_driver.base_driver import BaseDriver
+from src.core.helper.request_driver.http_cache import HttpCache, cache_key
+
+
+def create_session(pool_size: int = 10, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    session = requests.Session()
+    # one connection pool per host, at most pool_size keep-alive connections each, callers wait for a free one
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # urllib3 advertises br only when a brotli decoder is installed
+    session.headers["accept-encoding"] = ACCEPT_ENCODING
+    session.headers.update(headers or dict())
+    return session
 
 
 class RequestDriver(BaseDriver):
-    def __init__(self, inspector: RequestInspector) -> None:
+    def __init__(
+            self,
+            inspector: RequestInspector,
+            session: Optional[requests.Session] = None,
+            timeout: Tuple[float, float] = (REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT),
+            cache: Optional[HttpCache] = None,
+            cache_ttl: float = 0
+    ) -> None:
         self._headers = inspector.get_headers()
         self._inspector = inspector
+        self._session = session if session is not None else create_session(headers=self._headers)
+        self._timeout = timeout
+        self._cache = cache
+        self._cache_ttl = cache_ttl
 
     def get_resource(self, url: str, req_args: Dict[str, str]) -> str:
+        metrics.inc("pages_total")
+        if self._cache is None:
+            return self._get(url, req_args, self._headers).text
+        key = cache_key(url, req_args)
+        cached = self._cache.get(key)
+        if cached is None:
+            res = self._get(url, req_args, self._headers)
+        elif time.time() - cached.stored_at < self._cache_ttl:
+            metrics.inc("cache_hits_total", kind="fresh")
+            return cached.body
+        else:
+            res = self._get(url, req_args, dict(self._headers, **cached.validators()))
+            if res.status_code == 304:
+                metrics.inc("cache_hits_total", kind="revalidated")
+                self._cache.refresh(key)
+                return cached.body
+        self._cache.put(key, res.text, res.headers.get("etag"), res.headers.get("last-modified"))
+        return res.text
+
+    def _get(self, url: str, req_args: Dict[str, str], headers: Dict[str, str]) -> requests.Response:
         self._inspector.lock_request()
-        res = requests.get(url, params=req_args, headers=self._headers)
+        metrics.inc("requests_total", driver="request")
+        started = time.perf_counter()
+        try:
+            res = self._session.get(url, params=req_args, headers=headers, timeout=self._timeout)
+        except requests.RequestException as err:
+            metrics.inc("request_errors_total", driver="request")
+            raise RequestError(f"error while getting resource {url} - {err}") from err
+        finally:
+            metrics.observe("fetch_seconds", time.perf_counter() - started, driver="request")
+        metrics.inc("bytes_downloaded_total", len(res.content))
         if res.status_code >= 400:
-            raise RequestError(f"error while getting resource with status code - {res.status_code}")
-        return res.text
+            metrics.inc("request_errors_total", driver="request")
+            raise RequestError(f"error while getting resource with status code - {res.status_code}", res.status_code)
+        return res
+
+    def close(self) -> None:
+        self._session.close()
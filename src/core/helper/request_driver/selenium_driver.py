@@ -1,41 +1,103 @@
-from typing import Dict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
 
-from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
 
-from src.const import SELENIUM_REMOTE_DRIVER
+from src.core.entity.scrape_profile import ScrapeProfile
+from src.core.error import RequestError
+from src.core.helper.metrics import metrics
 from src.core.helper.req_inspector import RequestInspector
 from src.core.helper.request_driver.base_driver import BaseDriver
+from src.core.helper.request_driver.browser_pool import BrowserPool, BrowserSession, get_browser_pool
 
 
 class SeleniumDriver(BaseDriver):
-    def __init__(self, inspector: RequestInspector) -> None:
-        options = webdriver.ChromeOptions()
+    def __init__(
+            self,
+            inspector: RequestInspector,
+            pool: Optional[BrowserPool] = None,
+            hold: bool = False,
+            profile: ScrapeProfile = ScrapeProfile(),
+            ready_selector: Optional[str] = None
+    ) -> None:
+        # a holding driver keeps its browser between calls (the pager clicks through the page it loaded),
+        # otherwise every call borrows a browser from the pool and gives it back
         self._inspector = inspector
-        headers = inspector.get_headers()
-        for header in headers:
-            options.add_argument(f'--header="{header}:{headers[header]}"')
-        self.__driver = webdriver.Remote(
-            command_executor=SELENIUM_REMOTE_DRIVER,
-            options=options
-        )
+        self._pool = pool if pool is not None else get_browser_pool(inspector.get_headers(), profile)
+        self._hold = hold
+        self._ready_selector = ready_selector
+        self._ready_timeout = profile.ready_timeout
+        self._session: Optional[BrowserSession] = None
+        self._holding = False
+
+    @property
+    def pool(self) -> BrowserPool:
+        return self._pool
 
     def get_resource(self, url: str, req_args: Dict[str, str]) -> str:
-        self._inspector.lock_request()
-        self.__driver.get(url)
-        return self.get_data()
+        with self._browser() as browser:
+            self._inspector.lock_request()
+            metrics.inc("pages_total")
+            metrics.inc("requests_total", driver="selenium")
+            with metrics.timer("fetch_seconds", driver="selenium"):
+                data = browser.get(url, self._ready_selector, self._ready_timeout)
+            metrics.inc("bytes_downloaded_total", len(data.encode("utf-8")))
+            return data
+
+    def get_resources(self, urls: List[str]) -> List[str]:
+        # one browser, one tab per url
+        with self._browser() as browser:
+            for _ in urls:
+                self._inspector.lock_request()
+            metrics.inc("pages_total", len(urls))
+            metrics.inc("requests_total", len(urls), driver="selenium")
+            # one observation per batch of tabs, they load together
+            with metrics.timer("fetch_seconds", driver="selenium_tabs"):
+                pages = browser.get_many(urls, self._ready_selector, self._ready_timeout)
+            metrics.inc("bytes_downloaded_total", sum(len(page.encode("utf-8")) for page in pages))
+            return pages
 
     def move_to_page(self, by: str, value: str, action: str) -> None:
-        if action == "click":
-            self.__driver.find_element(by=_parse_by(by), value=value).click()
-        else:
-            self.__driver.execute_script(f"document.querySelector({value}).scrollIntoView()")
+        with self._browser() as browser:
+            if action == "click":
+                browser.driver.find_element(by=_parse_by(by), value=value).click()
+            else:
+                browser.driver.execute_script(f"document.querySelector({value}).scrollIntoView()")
+            browser.wait_ready(self._ready_selector, self._ready_timeout)
 
     def get_data(self) -> str:
-        return self.__driver.find_element(by=By.TAG_NAME, value="html").get_attribute("innerHTML")
+        with self._browser() as browser:
+            return browser.get_data()
+
+    def close(self) -> None:
+        # gives the held browser back, a later call leases a new one; the holder leaves first,
+        # so the pool shrinks by the browser it grew for
+        if self._holding:
+            self._pool.remove_holder()
+            self._holding = False
+        if self._session is not None:
+            self._pool.release(self._session)
+            self._session = None
 
-    def __del__(self):
-        self.__driver.quit()
+    @contextmanager
+    def _browser(self) -> Iterator[BrowserSession]:
+        if self._hold and not self._holding:
+            # the pool grows by the held browser, so holders never starve the borrowing article fetches
+            self._pool.add_holder()
+            self._holding = True
+        session = self._session if self._session is not None else self._pool.lease()
+        if self._hold:
+            self._session = session
+        try:
+            yield session
+        except WebDriverException as err:
+            metrics.inc("request_errors_total", driver="selenium")
+            session.broken = True
+            raise RequestError(f"error while driving browser - {err}") from err
+        finally:
+            if not self._hold:
+                self._pool.release(session)
 
 
 def _parse_by(text):
@@ -1,14 +1,28 @@
 import pathlib
 import sqlite3
-from typing import Dict, List, Set
+from datetime import datetime
+from typing import Iterable, List, Set, Optional, Tuple
 
-from src.core.entity import ArticleRow
+from src.core.entity import ArticleRow, ResourceWatermark, ArchiveEntry, PageObservation
+
+# sqlite builds before 3.32 allow at most 999 bound parameters per statement
+_MAX_VARIABLES = 900
 
 
 class SqlliteConnector:
-    def __init__(self, file_name: pathlib.Path):
-        self._conn = sqlite3.connect(file_name)
+    def __init__(self, file_name: pathlib.Path, batch_size: int = 500, reader: bool = False):
+        self._conn = sqlite3.connect(file_name, timeout=60)
         self._cursor = self._conn.cursor()
+        self._batch_size = batch_size
+        self._not_saved_new: List[ArticleRow] = list()
+        self._not_saved_parsed: List[Tuple[str, int, str, int, str]] = list()
+        self._not_saved_entries: List[ArchiveEntry] = list()
+        if reader:
+            # the writer set the index up already, a reader doesn't take its lock for the schema
+            return
+        # readers (pool workers) don't block the writer and the other way round
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
         self._conn.execute('''
         CREATE TABLE IF NOT EXISTS article_resources (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -28,27 +42,61 @@ class SqlliteConnector:
             FOREIGN KEY (article_resource_id) REFERENCES article_resources(id)
         );
         ''')
-        self._articles: Dict[str, ArticleRow] = dict()
-
-        self._not_saved_new: List[ArticleRow] = list()
-        self._not_saved_parsed: Set[str] = set()
+        # article ids are unique per resource; created separately so databases made before it get it too
+        self._conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS article_links_resource_article ON article_links (article_resource_id, id);
+        ''')
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS resource_watermarks (
+            article_resource_id INTEGER PRIMARY KEY,
+            published_ts REAL,
+            article_id VARCHAR(100),
+            updated_dt DATE,
+            FOREIGN KEY (article_resource_id) REFERENCES article_resources(id)
+        );
+        ''')
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS archive_entries (
+            article_resource_id INTEGER,
+            article_id VARCHAR(100),
+            kind VARCHAR(10),
+            shard VARCHAR(255),
+            offset INTEGER,
+            length INTEGER,
+            codec VARCHAR(10),
+            PRIMARY KEY (article_resource_id, article_id, kind)
+        );
+        ''')
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS resource_pages (
+            article_resource_id INTEGER,
+            page INTEGER,
+            min_ts REAL,
+            max_ts REAL,
+            size INTEGER,
+            observed_at REAL,
+            PRIMARY KEY (article_resource_id, page)
+        );
+        ''')
+        self._conn.commit()
 
     # for context manager
     def __enter__(self) -> 'SqlliteConnector':
-        self._cursor.execute(f"SELECT * FROM article_links ORDER BY published_dt")
-        for row in self._cursor.fetchall():
-            id_ = row[0]
-            self._articles[id_] = ArticleRow.from_row(row)
         return self
 
     def __exit__(self, type_, value, traceback):
-        self.save()
-        self._conn.commit()
+        try:
+            self.save()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._conn.close()
 
     # for context manager
 
-    def _add_article(self, article: ArticleRow) -> None:
-        self._cursor.execute("""
+    def _add_articles(self, articles: List[ArticleRow]) -> None:
+        self._cursor.executemany("""
         INSERT INTO article_links (
             id,
             href,
@@ -58,47 +106,143 @@ class SqlliteConnector:
             parsed_dt,
             article_archive_file_version,
             article_archive_file_path
-        )""", article.to_row())
-
-    def _mark_article_as_parsed(self, parsed_dt: str, article_archive_file_path: str, article_id: str) -> None:
-        self._cursor.execute(f"UPDATE articles SET parsed_dt = ?, article_archive_file_version = 1, article_archive_file_path=?  WHERE id = ?", (article_id, parsed_dt, article_archive_file_path))
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (article_resource_id, id) DO UPDATE SET
+            href = excluded.href,
+            slug = excluded.slug,
+            published_dt = excluded.published_dt,
+            parsed_dt = excluded.parsed_dt,
+            article_archive_file_version = excluded.article_archive_file_version,
+            article_archive_file_path = excluded.article_archive_file_path
+        """, [article.to_row() for article in articles])
+
+    def _mark_articles_as_parsed(self, rows: List[Tuple[str, int, str, int, str]]) -> None:
+        self._cursor.executemany("""
+        UPDATE article_links SET parsed_dt = ?, article_archive_file_version = ?, article_archive_file_path = ?
+        WHERE article_resource_id = ? AND id = ?
+        """, [(parsed_dt, version, path, resource_id, article_id) for parsed_dt, version, path, resource_id, article_id in rows])
+
+    def _add_archive_entries(self, entries: List[ArchiveEntry]) -> None:
+        self._cursor.executemany("""
+        INSERT OR REPLACE INTO archive_entries (article_resource_id, article_id, kind, shard, offset, length, codec)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [entry.to_row() for entry in entries])
 
     def save(self) -> None:
-        for article in self._not_saved_new:
-            self._add_article(article)
-        self._not_saved_new.clear()
-
-        for article_id in self._not_saved_parsed:
-            self._mark_article_as_parsed(article_id)
-        self._not_saved_parsed.clear()
+        if self._not_saved_entries:
+            self._add_archive_entries(self._not_saved_entries)
+            self._not_saved_entries.clear()
+        if self._not_saved_new:
+            self._add_articles(self._not_saved_new)
+            self._not_saved_new.clear()
+        if self._not_saved_parsed:
+            self._mark_articles_as_parsed(self._not_saved_parsed)
+            self._not_saved_parsed.clear()
+        self._conn.commit()
 
     def insert_article(self, article: ArticleRow, *, soft: bool = False) -> None:
-        if article.id in self._articles:
-            return
-        self._articles[article.id] = article
-        if soft:
-            self._not_saved_new.append(article)
-        else:
-            self._add_article(article)
-
-    # def set_parsed(self, article_id: str, *, soft: bool = False) -> None:
-    #     if self._articles[article_id].parsed_dt is not None:
-    #         return
-    #     row = self._articles[article_id]
-    #     self._articles[article_id] = row
-    #     if soft:
-    #         self._not_saved_parsed.add(article_id)
-    #     else:
-    #         self._mark_article_as_parsed(article_id)
-
-    def is_parsed(self, article_id: str) -> bool:
-        return self._articles.get(article_id).parsed_dt is not None
+        self.insert_articles([article], soft=soft)
+
+    def insert_articles(self, articles: Iterable[ArticleRow], *, soft: bool = False) -> None:
+        # soft rows are buffered and written with one executemany per batch
+        self._not_saved_new.extend(articles)
+        if not soft or len(self._not_saved_new) >= self._batch_size:
+            self.save()
+
+    def insert_archive_entries(self, entries: Iterable[ArchiveEntry], *, soft: bool = False) -> None:
+        self._not_saved_entries.extend(entries)
+        if not soft or len(self._not_saved_entries) >= self._batch_size:
+            self.save()
+
+    def get_archive_entries(self, resource_id: int, article_ids: Iterable[str]) -> List[ArchiveEntry]:
+        article_ids = list(article_ids)
+        entries = list()
+        for i in range(0, len(article_ids), _MAX_VARIABLES):
+            chunk = article_ids[i:i + _MAX_VARIABLES]
+            entries.extend(ArchiveEntry.from_row(row) for row in self._cursor.execute(
+                f"SELECT * FROM archive_entries WHERE article_resource_id = ? AND article_id IN ({','.join('?' * len(chunk))})",
+                (resource_id, *chunk)
+            ))
+        return entries
+
+    def set_parsed(
+            self,
+            resource_id: int,
+            article_id: str,
+            parsed_dt: datetime,
+            archive_file_version: int,
+            archive_file_path: str,
+            *,
+            soft: bool = False
+    ) -> None:
+        self._not_saved_parsed.append((parsed_dt.isoformat(), archive_file_version, archive_file_path, resource_id, article_id))
+        if not soft or len(self._not_saved_parsed) >= self._batch_size:
+            self.save()
+
+    def is_parsed(self, resource_id: int, article_id: str) -> bool:
+        row = self._cursor.execute(
+            "SELECT parsed_dt FROM article_links WHERE article_resource_id = ? AND id = ?", (resource_id, article_id)
+        ).fetchone()
+        return row is not None and row[0] is not None
 
     def get_size(self) -> int:
-        return len(self._articles)
+        return self._cursor.execute("SELECT COUNT(*) FROM article_links").fetchone()[0]
+
+    def has_article(self, resource_id: int, article_id: str) -> bool:
+        return len(self.existing_ids(resource_id, [article_id])) > 0
+
+    def existing_ids(self, resource_id: int, article_ids: Iterable[str]) -> Set[str]:
+        article_ids = list(article_ids)
+        found = set()
+        for i in range(0, len(article_ids), _MAX_VARIABLES):
+            chunk = article_ids[i:i + _MAX_VARIABLES]
+            found.update(row[0] for row in self._cursor.execute(
+                f"SELECT id FROM article_links WHERE article_resource_id = ? AND id IN ({','.join('?' * len(chunk))})",
+                (resource_id, *chunk)
+            ))
+        return found
+
+    def get_article_info(self, resource_id: int, article_id: str) -> Optional[ArticleRow]:
+        row = self._cursor.execute(
+            "SELECT * FROM article_links WHERE article_resource_id = ? AND id = ?", (resource_id, article_id)
+        ).fetchone()
+        return ArticleRow.from_row(row) if row is not None else None
+
+    def get_resource_id(self, href: str) -> int:
+        row = self._cursor.execute("SELECT id FROM article_resources WHERE href = ?", (href,)).fetchone()
+        if row is not None:
+            return row[0]
+        self._cursor.execute("INSERT INTO article_resources (href) VALUES (?)", (href,))
+        self._conn.commit()
+        return self._cursor.lastrowid
+
+    def get_page_observations(self, resource_id: int) -> List[PageObservation]:
+        return [PageObservation.from_row(row) for row in self._cursor.execute(
+            "SELECT * FROM resource_pages WHERE article_resource_id = ? ORDER BY page", (resource_id,)
+        )]
+
+    def set_page_observations(self, observations: Iterable[PageObservation]) -> None:
+        self._cursor.executemany(
+            "INSERT OR REPLACE INTO resource_pages VALUES (?, ?, ?, ?, ?, ?)", [observation.to_row() for observation in observations]
+        )
+        self._conn.commit()
 
-    def has_article(self, article_id: str) -> bool:
-        return self._articles.get(article_id, None) is not None
+    def get_watermark(self, resource_id: int) -> Optional[ResourceWatermark]:
+        row = self._cursor.execute("""
+        SELECT article_resource_id, published_ts, article_id, updated_dt FROM resource_watermarks WHERE article_resource_id = ?
+        """, (resource_id,)).fetchone()
+        return ResourceWatermark.from_row(row) if row is not None else None
 
-    def get_article_info(self, article_id: str) -> ArticleRow:
-        return self._articles[article_id]
+    def set_watermark(self, watermark: ResourceWatermark) -> None:
+        # pending article rows go first, the mark must never get ahead of the index
+        self.save()
+        # the mark only moves forward
+        self._cursor.execute("""
+        INSERT INTO resource_watermarks (article_resource_id, published_ts, article_id, updated_dt) VALUES (?, ?, ?, ?)
+        ON CONFLICT(article_resource_id) DO UPDATE SET
+            published_ts = excluded.published_ts,
+            article_id = excluded.article_id,
+            updated_dt = excluded.updated_dt
+        WHERE excluded.published_ts > resource_watermarks.published_ts
+        """, watermark.to_row())
+        self._conn.commit()
@@ -0,0 +1,141 @@
+import pathlib
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Union, Tuple
+
+from src.core.entity import ArticleInfo, ArticleRow, ResourceWatermark, PageObservation
+from src.core.helper.archive import ArchiveWriter
+from src.core.helper.metrics import metrics
+from src.core.helper.sqllite_connector import SqlliteConnector
+
+_STOP = object()
+
+
+class WriterStage:
+    # persists articles on its own thread: archive writes and index upserts go in batches,
+    # with one fsync and one commit per batch, while the caller keeps receiving from the workers
+    def __init__(
+            self,
+            index_file: pathlib.Path,
+            writer: ArchiveWriter,
+            batch_size: int = 200,
+            queue_size: Optional[int] = None,
+            flush_interval: float = 1.0,
+            resource_names: Optional[Dict[int, str]] = None
+    ) -> None:
+        self._index_file = index_file
+        # metrics label of each resource id
+        self._resource_names = resource_names or dict()
+        self._writer = writer
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        # one batch by default, queued articles hold their full html
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size if queue_size is not None else batch_size)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="writer-stage", daemon=True)
+
+    def start(self) -> 'WriterStage':
+        self._thread.start()
+        return self
+
+    def put_article(self, resource_id: int, article: ArticleInfo) -> None:
+        self._put((resource_id, article))
+
+    def put_watermark(self, watermark: ResourceWatermark) -> None:
+        self._put(watermark)
+
+    def put_pages(self, pages: List[PageObservation]) -> None:
+        self._put(pages)
+
+    def _put(self, item) -> None:
+        # blocks while the queue is full, which pushes back on the workers through their own bounded queue
+        while True:
+            self._raise_error()
+            try:
+                self._queue.put(item, timeout=self._flush_interval)
+                return
+            except queue.Full:
+                continue
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._put(_STOP)
+            self._thread.join()
+        self._raise_error()
+
+    def __enter__(self) -> 'WriterStage':
+        return self.start()
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    def _next_batch(self) -> Tuple[List[Union[Tuple[int, ArticleInfo], ResourceWatermark, List[PageObservation]]], bool]:
+        batch = [self._queue.get()]
+        while len(batch) < self._batch_size and batch[-1] is not _STOP:
+            try:
+                batch.append(self._queue.get(timeout=self._flush_interval))
+            except queue.Empty:
+                break
+        stop = batch[-1] is _STOP
+        return (batch[:-1] if stop else batch), stop
+
+    def _run(self) -> None:
+        try:
+            with SqlliteConnector(self._index_file, batch_size=self._batch_size) as conn:
+                stop = False
+                while not stop:
+                    batch, stop = self._next_batch()
+                    self._write_batch(conn, batch)
+        except BaseException as err:
+            self._error = err
+            # keep draining so producers blocked on put notice the error instead of hanging
+            while True:
+                try:
+                    self._queue.get(timeout=self._flush_interval)
+                except queue.Empty:
+                    break
+
+    def _write_batch(self, conn: SqlliteConnector, batch: List[Union[Tuple[int, ArticleInfo], ResourceWatermark, List[PageObservation]]]) -> None:
+        rows = list()
+        entries = list()
+        watermarks = list()
+        pages = list()
+        for item in batch:
+            if isinstance(item, ResourceWatermark):
+                watermarks.append(item)
+                continue
+            if isinstance(item, list):
+                pages.extend(item)
+                continue
+            resource_id, article = item
+            started = time.perf_counter()
+            path, article_entries = self._writer.write(resource_id, f"binance_{article.id}", article)
+            resource = self._resource_names.get(resource_id, str(resource_id))
+            metrics.observe("save_seconds", time.perf_counter() - started, resource)
+            metrics.inc("articles_saved_total", resource=resource)
+            entries.extend(article_entries)
+            rows.append(ArticleRow(
+                id=article.id,
+                href=article.href,
+                slug=article.slug,
+                published_dt=article.publication_dt,
+                article_resource_id=resource_id,
+                parsed_dt=article.parsing_dt,
+                article_archive_file_version=self._writer.version,
+                article_archive_file_path=path
+            ))
+        # archive bytes are on disk before the index points at them
+        self._writer.sync()
+        conn.insert_archive_entries(entries, soft=True)
+        conn.insert_articles(rows, soft=True)
+        conn.save()
+        # a watermark arrives after all articles of its resource, which are in this or an earlier batch
+        for watermark in watermarks:
+            conn.set_watermark(watermark)
+        if pages:
+            conn.set_page_observations(pages)
@@ -0,0 +1,109 @@
+from typing import Any, Callable, Dict
+
+
+class ParserBackend:
+    def parse(self, data: Any) -> Any:
+        pass
+
+    def compile(self, selector: str) -> Callable[[Any], list]:
+        pass
+
+    def is_node(self, data: Any) -> bool:
+        pass
+
+    def get_attr(self, node: Any, attr: str) -> Any:
+        pass
+
+
+class SoupBackend(ParserBackend):
+    def __init__(self, builder: str = "html.parser") -> None:
+        from bs4 import BeautifulSoup, Tag
+        import soupsieve
+        self._builder = builder
+        self._soup = BeautifulSoup
+        self._tag = Tag
+        self._soupsieve = soupsieve
+
+    def parse(self, data: Any) -> Any:
+        return self._soup(data, self._builder)
+
+    def compile(self, selector: str) -> Callable[[Any], list]:
+        sv = self._soupsieve.compile(selector)
+
+        def select(node: Any) -> list:
+            # a sub-tree must behave like a re-parsed fragment, where the top element can match too
+            found = sv.select(node)
+            if not isinstance(node, self._soup) and sv.match(node):
+                found.insert(0, node)
+            return found
+        return select
+
+    def is_node(self, data: Any) -> bool:
+        return isinstance(data, self._tag)
+
+    def get_attr(self, node: Any, attr: str) -> Any:
+        match attr:
+            case None:
+                return str(node)
+            case "text":
+                return node.text
+            case "tag":
+                return node
+            case _:
+                return node[attr]
+
+
+class LxmlBackend(ParserBackend):
+    def __init__(self) -> None:
+        from lxml import etree, html
+        from lxml.cssselect import CSSSelector
+        self._etree = etree
+        self._html = html
+        self._css_selector = CSSSelector
+        self._parser = html.HTMLParser(encoding="utf-8")
+        # same as bs4 .text, which leaves out script and style contents
+        self._text = etree.XPath(".//text()[not(ancestor::script) and not(ancestor::style)]")
+
+    def parse(self, data: Any) -> Any:
+        # bytes with a fixed encoding, lxml refuses unicode input that carries an xml encoding declaration
+        try:
+            return self._html.document_fromstring(data.encode() if isinstance(data, str) else data, parser=self._parser)
+        except self._etree.ParserError:
+            return self._html.Element("html")
+
+    def compile(self, selector: str) -> Callable[[Any], list]:
+        # the translated xpath starts with descendant-or-self::, so the top element of a sub-tree can match too
+        return self._css_selector(selector, translator="html")
+
+    def is_node(self, data: Any) -> bool:
+        return isinstance(data, self._etree.ElementBase)
+
+    def get_attr(self, node: Any, attr: str) -> Any:
+        match attr:
+            case None:
+                return self._html.tostring(node, encoding=str)
+            case "text":
+                return "".join(self._text(node))
+            case "tag":
+                return node
+            case _:
+                return node.attrib[attr]
+
+
+parser_backends: Dict[str, Callable[[], ParserBackend]] = {
+    "html.parser": lambda: SoupBackend("html.parser"),
+    "bs4-lxml": lambda: SoupBackend("lxml"),
+    "lxml": LxmlBackend,
+}
+_backends: Dict[str, ParserBackend] = dict()
+
+
+def get_backend(name: str) -> ParserBackend:
+    backend = _backends.get(name)
+    if backend is None:
+        backend = _backends[name] = parser_backends[name]()
+    return backend
+
+
+# lxml keeps other whitespace in .text than html.parser, recipes switch to it themselves
+DEFAULT_BACKEND = "html.parser"
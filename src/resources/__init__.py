@@ -0,0 +1,56 @@
+import ast
+import importlib
+import pathlib
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+
+class ResourceInfo(NamedTuple):
+    # module name in this package
+    name: str
+    href: str
+    host: str
+
+
+def discover(folder: pathlib.Path = pathlib.Path(__file__).parent) -> Dict[str, ResourceInfo]:
+    # reads the settings href of every resource module from its source, without importing it
+    resources = dict()
+    for path in sorted(folder.glob("*.py")):
+        if path.stem == "__init__":
+            continue
+        href = _settings_href(ast.parse(path.read_text(encoding="utf-8"), str(path)))
+        if href is not None:
+            resources[path.stem] = ResourceInfo(path.stem, href, urlparse(href).hostname or "")
+    return resources
+
+
+def resolve(selectors: List[str], resources: Optional[Dict[str, ResourceInfo]] = None) -> List[ResourceInfo]:
+    # a selector is a module name, a host (every resource of a site), any url on a host, or "all"
+    resources = resources if resources is not None else discover()
+    selected = dict()
+    for selector in selectors:
+        if selector == "all":
+            matched = list(resources.values())
+        elif selector in resources:
+            matched = [resources[selector]]
+        else:
+            host = (urlparse(selector).hostname or selector).removeprefix("www.")
+            matched = [info for info in resources.values() if info.host.removeprefix("www.") == host]
+        if not matched:
+            raise ValueError(f"unknown resource {selector}, known are {', '.join(resources)}")
+        selected.update((info.name, info) for info in matched)
+    return list(selected.values())
+
+
+def load(info: ResourceInfo):
+    return importlib.import_module(f"{__name__}.{info.name}").settings
+
+
+def _settings_href(tree: ast.Module) -> Optional[str]:
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == "settings" for target in node.targets) \
+                and isinstance(node.value, ast.Call):
+            for keyword in node.value.keywords:
+                if keyword.arg == "href" and isinstance(keyword.value, ast.Constant):
+                    return keyword.value.value
+    return None
@@ -9,7 +9,7 @@ list_recipe = ElementRecipe(
 article_info_recipe = ElementRecipe(
     tags={
         "id": TagRecipe(selector="article", attr="id", filters=["get_first", "split_string_dash_1"], action=None),
-        "slug": TagRecipe(selector="head > meta[property='og:url']", attr="content", filters=["get_slug_from_url"], action=None),
+        "slug": TagRecipe(selector="head > meta[property='og:url']", attr="content", filters=["get_first", "get_slug_from_url"], action=None),
         "header": TagRecipe(selector="article > h1.h4", attr="text", filters=["get_first"], action=None),
         "content": TagRecipe(selector="article > div.entry-content", attr="text", filters=["get_first"], action=None),
         "publication_dt": TagRecipe(selector="article > time", attr="datetime",
@@ -10,7 +10,7 @@ article_info_recipe = ElementRecipe(
         "id": TagRecipe(selector="article", attr="id", filters=["get_first", "split_string_dash_1"], action=None),
         "header": TagRecipe(selector="div.entry-post > header > div.page-title > h1", attr="text", filters=["get_first"], action=None),
         "content": TagRecipe(selector="div.entry-post > div", attr="text", filters=["get_first"], action=None),
-        "slug": TagRecipe(selector="head > meta[property='og:url']", attr="content", filters=["get_slug_from_url"], action=None),
+        "slug": TagRecipe(selector="head > meta[property='og:url']", attr="content", filters=["get_first", "get_slug_from_url"], action=None),
         "publication_dt": TagRecipe(selector="div.entry-post > header > div.entry-meta > span.entry-date > span", attr="text", filters=["get_first", "date_format_b_d_Y_A_H_M"], action=None),
         "href": TagRecipe(selector="head > meta[property='og:url']", attr="content", filters=["get_first"], action=None),
         "meta_keywords": TagRecipe(selector="meta[content]", attr="content", filters=[], action=None)